@@ -1,9 +1,12 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils.translation import ngettext
 from django.contrib import messages
 
-from .image_helpers import delete_rendition
 from . import models
 
 
@@ -35,6 +38,8 @@ class AssetAdmin(admin.ModelAdmin):
 
     list_filter = [
         "license",
+        "orientation",
+        "image_format",
     ]
 
     actions = [
@@ -56,13 +61,67 @@ class AssetAdmin(admin.ModelAdmin):
     def delete_renditions(self, request, queryset):
         deleted = 0
 
-        for obj in queryset:
-            deleted_result = delete_rendition(obj.file)
-            if deleted_result:
-                deleted += 1
+        for rendition in models.Rendition.objects.filter(asset__in=queryset):
+            rendition.purge()
+            deleted += 1
 
         self.message_user(request, ngettext(
             '%d rendition was successfully deleted.',
             '%d renditions were successfully deleted.',
             deleted,
         ) % deleted, messages.SUCCESS)
+
+
+@admin.register(models.ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ["filename", "created_by", "offset", "size", "asset", "updated_at"]
+    search_fields = ["filename", "title", "created_by"]
+    readonly_fields = ["offset", "size", "chunk_size", "asset"]
+
+
+@admin.register(models.RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Profiles of single requests, see `profiling.py`. Filter by URL name to
+    see the recent profiles of one page.
+    """
+    list_display = ["created_at", "url_name", "method", "path", "status", "duration_ms", "format", "sampled", "created_by", "download_link"]
+    list_filter = ["url_name", "format", "sampled"]
+    search_fields = ["path", "created_by"]
+    date_hierarchy = "created_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:object_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description="Duration", ordering="duration")
+    def duration_ms(self, obj):
+        return f"{obj.duration * 1000:.0f} ms"
+
+    @admin.display(description="Profile")
+    def download_link(self, obj):
+        return format_html(
+            '<a href="{url}">{filename}</a>',
+            url=reverse("admin:core_requestprofile_download", args=[obj.pk]),
+            filename=obj.filename,
+        )
+
+    def download_view(self, request, object_id):
+        profile = get_object_or_404(models.RequestProfile, pk=object_id)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        try:
+            return FileResponse(open(profile.file_path, "rb"), as_attachment=True, filename=profile.filename)
+        except FileNotFoundError:
+            raise Http404("Profile file not found")
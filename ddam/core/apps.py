@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'ddam.core'
+
+    def ready(self):
+        # Connect the signal handlers
+        from . import catalogue, counters, instrumentation, search  # noqa: F401
@@ -0,0 +1,293 @@
+"""
+Micro-benchmarks of the hot paths: rendition generation, upload
+validation, asset filtering, the related object lists and rendering the
+asset list. Run them against a dedicated database with a seeded catalogue,
+they regenerate renditions:
+
+    ./manage.py seed_catalogue --assets 10000
+    ./manage.py run_benchmarks --output before.json
+    # … change something …
+    ./manage.py run_benchmarks --output after.json --compare before.json
+
+Each benchmark runs a few times after a warm-up, the results are timings
+in milliseconds and the number of database queries of one run, written as
+JSON to compare them between commits.
+"""
+
+import platform
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from .filters import AssetFilter
+from .models import Asset, Rendition
+from .tasks import generate_renditions
+from .tiles import get_tile_cache_key, render_asset_tiles
+from .validators import probe_file, validate_filetype
+from .views import DealerListView, LicenseListView, UsageListView
+
+
+Benchmark = namedtuple("Benchmark", "name func setup")
+Benchmark.__doc__ = """
+`func` gets timed, `setup`, if given, runs untimed before each run and
+returns the arguments for `func`.
+"""
+
+# Query strings of the asset list, as the filter form sends them
+ASSET_FILTERS = {
+    "all": "",
+    "search": "title=benchmark+asset",
+    "license": "license={license}",
+    "usage": "usage={usage}",
+    "orientation": "orientation=landscape&min_width=200",
+    "captured": "captured_after=2018-01-01&captured_before=2020-12-31&sort=taken",
+    "largest": "sort=largest",
+}
+
+SCHEMA_VERSION = 1
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the queries run in the block, without needing `DEBUG`.
+    """
+    counter = {"queries": 0}
+
+    def execute(execute, sql, params, many, context):
+        counter["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(execute):
+        yield counter
+
+
+def measure(benchmark, runs, warmup=1):
+    """
+    Time `benchmark` and return its result as dict.
+    """
+    for _ in range(warmup):
+        benchmark.func(*(benchmark.setup() if benchmark.setup else ()))
+
+    timings = []
+    queries = 0
+    for _ in range(runs):
+        args = benchmark.setup() if benchmark.setup else ()
+        with count_queries() as counter:
+            started = time.perf_counter()
+            benchmark.func(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = counter["queries"]
+
+    timings.sort()
+    return {
+        "runs": runs,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p95_ms": round(timings[min(runs - 1, int(runs * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+        "queries": queries,
+    }
+
+
+def _asset_queryset():
+    # The same as `views.asset_filter_list`
+    return (
+        Asset
+        .objects
+        .select_related("license")
+        .prefetch_related("renditions")
+        .order_by("-created_at", "-id")
+    )
+
+
+def _filter_params(query):
+    asset = Asset.objects.exclude(license=None).filter(usage__isnull=False).first()
+    query = query.format(
+        license=asset.license_id if asset else "",
+        usage=asset.usage.values_list("pk", flat=True).first() if asset else "",
+    )
+    return QueryDict(query)
+
+
+def _filter_assets(params):
+    asset_filter = AssetFilter(params, queryset=_asset_queryset())
+    asset_filter.is_valid()
+    page = asset_filter.paginate()
+    asset_filter.facet_counts
+    return asset_filter, page
+
+
+def _list_request(user):
+    request = RequestFactory().get("/core/")
+    request.user = user
+    # What the htmx middleware would set for a full page request
+    request.htmx = False
+    return request
+
+
+def _render_asset_list(request, asset_filter, page):
+    asset_filter.label_facets()
+    context = {
+        "filter": asset_filter,
+        "page": page,
+        "tiles": render_asset_tiles(page.object_list),
+    }
+    return render_to_string("core/asset_filter_list.html", context, request)
+
+
+def _related_list(view_class, request):
+    view = view_class()
+    view.setup(request)
+    return list(view.get_queryset())
+
+
+def _rendition_source():
+    asset = (
+        Asset
+        .objects
+        .exclude(file="")
+        .exclude(image_format__in=["", "SVG"])
+        .order_by("created_at", "id")
+        .first()
+    )
+    if asset is None:
+        raise BenchmarkError("No raster image assets, seed the catalogue first.")
+    return asset
+
+
+def _purge_renditions(asset):
+    for rendition in Rendition.objects.filter(asset=asset):
+        rendition.purge()
+    return (asset.pk,)
+
+
+def _uploaded_copy(asset):
+    with asset.file.open("rb") as file:
+        data = file.read()
+    return lambda: (SimpleUploadedFile(asset.filename_orig, data),)
+
+
+def get_benchmarks(user):
+    """
+    All benchmarks, in the order they run.
+    """
+    source = _rendition_source()
+    uploaded_copy = _uploaded_copy(source)
+    benchmarks = [
+        # Rendition generation, as done by the tasks worker: cold generates
+        # all presets and formats, warm finds the current ones
+        Benchmark(
+            "renditions.cold",
+            lambda asset_id: generate_renditions.call(str(asset_id)),
+            lambda: _purge_renditions(source),
+        ),
+        Benchmark(
+            "renditions.warm",
+            lambda: generate_renditions.call(str(source.pk)),
+            None,
+        ),
+        # Upload validation: the mime type check alone and the whole probe
+        Benchmark("validate.filetype", validate_filetype, uploaded_copy),
+        Benchmark("validate.probe_file", probe_file, uploaded_copy),
+    ]
+
+    for name, query in ASSET_FILTERS.items():
+        params = _filter_params(query)
+        benchmarks.append(Benchmark(
+            f"filter.{name}",
+            lambda params=params: _filter_assets(params),
+            None,
+        ))
+
+    request = _list_request(user)
+    for view_class in (UsageListView, LicenseListView, DealerListView):
+        benchmarks.append(Benchmark(
+            f"related_list.{view_class.model._meta.model_name}",
+            lambda view_class=view_class: _related_list(view_class, request),
+            None,
+        ))
+
+    def list_setup(clear_tiles):
+        asset_filter, page = _filter_assets(_filter_params(""))
+        if clear_tiles:
+            cache.delete_many([get_tile_cache_key(asset) for asset in page.object_list])
+        return request, asset_filter, page
+
+    benchmarks += [
+        Benchmark("render.asset_list.cold_tiles", _render_asset_list, lambda: list_setup(True)),
+        Benchmark("render.asset_list.cached_tiles", _render_asset_list, lambda: list_setup(False)),
+    ]
+    return benchmarks
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(runs, only=None, user=None, report=None):
+    """
+    Run the benchmarks whose names start with one of `only`, or all, and
+    return the results. `report` gets called with each name and result.
+    """
+    user = user or AnonymousUser()
+    results = {}
+    for benchmark in get_benchmarks(user):
+        if only and not benchmark.name.startswith(tuple(only)):
+            continue
+        results[benchmark.name] = measure(benchmark, runs)
+        if report:
+            report(benchmark.name, results[benchmark.name])
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "commit": _git_commit(),
+        "created_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "assets": Asset.objects.count(),
+        "benchmarks": results,
+    }
+
+
+def compare_results(before, after):
+    """
+    `(name, before median, after median, change)` of the benchmarks in
+    both results, `change` being relative to before.
+    """
+    rows = []
+    for name, result in after["benchmarks"].items():
+        previous = before["benchmarks"].get(name)
+        if previous is None or not previous["median_ms"]:
+            continue
+        change = result["median_ms"] / previous["median_ms"] - 1
+        rows.append((name, previous["median_ms"], result["median_ms"], change))
+    return rows
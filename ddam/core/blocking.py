@@ -0,0 +1,37 @@
+"""
+A bounded thread pool for blocking file work in async views.
+
+asgiref's `sync_to_async` runs thread sensitive code, like the ORM, in one
+shared thread. File reads do not need that: they run here, so a slow disk
+neither blocks the event loop nor queues up behind database work. The
+pool is bounded by `DDAM_BLOCKING_WORKERS`, excess work waits for a free
+thread instead of spawning new ones.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DDAM_BLOCKING_WORKERS,
+            thread_name_prefix="ddam-blocking",
+        )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run `func` in the pool and wait for its result. `func` must not touch
+    the database.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
@@ -0,0 +1,91 @@
+"""
+A catalogue wide version for conditional GET requests.
+
+Every write to assets, renditions, usages, licenses or dealers bumps a
+timestamp in the shared cache. Pages showing catalogue data derive their
+ETag from it, so revalidating an unchanged page costs one cache lookup
+and no database query or template rendering.
+
+Model signals bump the version for single writes, bulk operations call
+`bump_catalogue_version` themselves.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.middleware.csrf import get_token
+
+from ddam.organization.models import BRANDING_VERSION_CACHE_KEY
+
+
+CATALOGUE_VERSION_CACHE_KEY = "ddam:catalogue-version"
+
+
+def bump_catalogue_version():
+    """
+    Call after changing catalogue data without model signals. Bumped once
+    the transaction commits, so no stale page gets the new version.
+    """
+    transaction.on_commit(
+        lambda: cache.set(CATALOGUE_VERSION_CACHE_KEY, time.time(), None)
+    )
+
+
+def get_catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_CACHE_KEY, time.time(), None)
+        version = cache.get(CATALOGUE_VERSION_CACHE_KEY)
+    return version
+
+
+def _has_pending_messages(request):
+    # A 304 would swallow them
+    return len(messages.get_messages(request)) > 0
+
+
+def catalogue_etag(request, *args, **kwargs):
+    """
+    ETag of a page showing catalogue data: the catalogue and branding
+    versions, scoped to the user, their CSRF secret, the requested URL
+    including all filters and whether htmx asked for a fragment.
+    """
+    if _has_pending_messages(request):
+        return None
+
+    # Pages embed a CSRF token, valid as long as the secret is the same.
+    # Make sure there is one, as the page would set it.
+    get_token(request)
+
+    versions = cache.get_many([CATALOGUE_VERSION_CACHE_KEY, BRANDING_VERSION_CACHE_KEY])
+    parts = [
+        versions.get(CATALOGUE_VERSION_CACHE_KEY) or get_catalogue_version(),
+        versions.get(BRANDING_VERSION_CACHE_KEY),
+        request.user.pk,
+        request.META["CSRF_COOKIE"],
+        request.get_full_path(),
+        request.headers.get("HX-Request"),
+        request.headers.get("HX-History-Restore-Request"),
+    ]
+    return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def catalogue_last_modified(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    return datetime.fromtimestamp(get_catalogue_version(), tz=timezone.utc)
+
+
+def _bump_on_change(sender, **kwargs):
+    bump_catalogue_version()
+
+
+for model in ("core.Asset", "core.Rendition", "core.Usage", "core.License", "core.Dealer"):
+    post_save.connect(_bump_on_change, sender=model, dispatch_uid=f"catalogue-save-{model}")
+    post_delete.connect(_bump_on_change, sender=model, dispatch_uid=f"catalogue-delete-{model}")
+m2m_changed.connect(_bump_on_change, sender="core.Asset_usage", dispatch_uid="catalogue-usage")
@@ -0,0 +1,63 @@
+"""
+Keep the denormalized `asset_count` of usages, licenses and dealers up to
+date, see `AbstractRelatedObjectMixin.update_asset_counts`. Bulk operations
+on assets are covered by `AssetQuerySet`,
+
+    ./manage.py recompute_asset_counts
+
+fixes the counts after raw SQL changes.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Asset, Dealer, License, Usage
+
+
+@receiver(pre_save, sender=Asset)
+def remember_counted_relations(sender, instance, raw=False, **kwargs):
+    instance._counted_ids = None
+    if not instance._state.adding:
+        instance._counted_ids = (
+            Asset
+            .objects
+            .filter(pk=instance.pk)
+            .values_list("license_id", "dealer_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Asset)
+def update_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    old_license_id, old_dealer_id = getattr(instance, "_counted_ids", None) or (None, None)
+    if created or old_license_id != instance.license_id:
+        License.update_asset_counts([old_license_id, instance.license_id])
+    if created or old_dealer_id != instance.dealer_id:
+        Dealer.update_asset_counts([old_dealer_id, instance.dealer_id])
+
+
+@receiver(pre_delete, sender=Asset)
+def remember_counted_usage(sender, instance, **kwargs):
+    # The usage relation is gone after deleting, without m2m_changed
+    instance._counted_usage_ids = list(instance.usage.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Asset)
+def update_counts_on_delete(sender, instance, **kwargs):
+    License.update_asset_counts([instance.license_id])
+    Dealer.update_asset_counts([instance.dealer_id])
+    Usage.update_asset_counts(getattr(instance, "_counted_usage_ids", []))
+
+
+@receiver(m2m_changed, sender=Asset.usage.through)
+def update_usage_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Assets added to or removed from a usage
+        if action.startswith("post_"):
+            Usage.update_asset_counts([instance.pk])
+    elif action == "pre_clear":
+        instance._counted_usage_ids = list(instance.usage.values_list("pk", flat=True))
+    elif action == "post_clear":
+        Usage.update_asset_counts(getattr(instance, "_counted_usage_ids", []))
+    elif action in ("post_add", "post_remove"):
+        Usage.update_asset_counts(pk_set)
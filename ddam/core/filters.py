@@ -1,19 +1,40 @@
+import uuid
+
 from django import forms
-from django.db.models import Count, Q
+from django.conf import settings
+from django.db.models import Case, CharField, Count, Value, When
+from django.db.models.functions import Cast
+from django.utils.functional import cached_property
 
 import django_filters
+from django_filters.widgets import DateRangeWidget
 
 from .models import Asset, License, Usage
 from .forms import AssetFilterForm
+from .pagination import DEFAULT_ORDERING, apaginate_keyset, paginate_keyset
+from .search import search_assets
 
 
 class AssetFilter(django_filters.FilterSet):
+    # Filters showing the number of matching assets per choice
+    FACETS = ["usage", "license", "dealer", "with_costs"]
+
+    # Keyset orderings by `sort` choice, each ending in the unique id
+    SORT_ORDERINGS = {
+        "oldest": ("created_at", "id"),
+        "largest": ("-file_size", "-id"),
+        "smallest": ("file_size", "id"),
+        "taken": ("-captured_at", "-id"),
+    }
 
     def custom_string_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(title__icontains=value) |
-            Q(description__icontains=value)
-        )
+        return search_assets(queryset, value)
+
+    def sort_assets(self, queryset, name, value):
+        if value == "taken":
+            # Keyset pagination needs a sort key on every row
+            return queryset.filter(captured_at__isnull=False)
+        return queryset
 
     title = django_filters.CharFilter(
         method='custom_string_search',
@@ -28,10 +49,8 @@ class AssetFilter(django_filters.FilterSet):
         queryset=(
             Usage
             .objects
-            .annotate(
-                count=Count('asset'),
-            )
-            # .exclude(count=0)
+            .order_by("-asset_count")
+            # .exclude(asset_count=0)
         )
     )
     license = django_filters.ModelChoiceFilter(
@@ -43,12 +62,139 @@ class AssetFilter(django_filters.FilterSet):
         queryset=(
             License
             .objects
-            .annotate(
-                count=Count('asset'),
-            )
+            .order_by("-asset_count")
         )
     )
 
+    orientation = django_filters.ChoiceFilter(
+        choices=Asset.Orientation.choices,
+        empty_label="Any",
+        widget=forms.RadioSelect,
+    )
+    min_width = django_filters.NumberFilter(
+        field_name='width',
+        lookup_expr='gte',
+        label="Min. width (px)",
+    )
+    min_height = django_filters.NumberFilter(
+        field_name='height',
+        lookup_expr='gte',
+        label="Min. height (px)",
+    )
+    captured = django_filters.DateFromToRangeFilter(
+        field_name='captured_at',
+        label="Date taken",
+        widget=DateRangeWidget(attrs={"type": "date"}),
+    )
+    sort = django_filters.ChoiceFilter(
+        method='sort_assets',
+        choices=[
+            ("oldest", "Oldest first"),
+            ("largest", "Largest file first"),
+            ("smallest", "Smallest file first"),
+            ("taken", "Recently taken first"),
+        ],
+        empty_label="Newest first",
+        label="Sort",
+    )
+
+    def get_ordering(self):
+        """
+        Search results come most relevant first, unless sorted otherwise.
+        """
+        queryset = self.qs
+        sort = self.form.cleaned_data.get("sort")
+        if not sort and "search_rank" in queryset.query.annotations:
+            return ("search_rank", *DEFAULT_ORDERING)
+        return self.SORT_ORDERINGS.get(sort, DEFAULT_ORDERING)
+
+    def paginate(self, cursor=None, page_size=None):
+        """
+        Keyset paginate the filtered queryset, see `pagination.paginate_keyset`.
+        """
+        return paginate_keyset(
+            self.qs,
+            cursor=cursor,
+            page_size=page_size or settings.DDAM_ASSET_LIST_PAGE_SIZE,
+            ordering=self.get_ordering(),
+        )
+
+    async def apaginate(self, cursor=None, page_size=None):
+        """
+        Async version of `paginate`. Validate the form first, in sync code:
+        that looks up the chosen related objects.
+        """
+        return await apaginate_keyset(
+            self.qs,
+            cursor=cursor,
+            page_size=page_size or settings.DDAM_ASSET_LIST_PAGE_SIZE,
+            ordering=self.get_ordering(),
+        )
+
+    def _filter_queryset_without(self, facet):
+        """
+        The queryset filtered by everything but the facet's own filter, so
+        its other choices keep their counts once one got selected.
+        """
+        queryset = self.queryset.all()
+        for name, value in self.form.cleaned_data.items():
+            if name != facet:
+                queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    @cached_property
+    def facet_counts(self):
+        """
+        `{facet: {value: count}}` for the current search and filters, all
+        facets in one query: one grouped SELECT per facet, combined with
+        UNION ALL.
+        """
+        counts = {facet: {} for facet in self.FACETS}
+        if not self.is_valid():
+            return counts
+
+        grouped = []
+        for facet in self.FACETS:
+            if facet == "with_costs":
+                value = Case(When(with_costs=True, then=Value("1")), default=Value("0"))
+            else:
+                value = Cast(facet, CharField())
+            grouped.append(
+                self
+                ._filter_queryset_without(facet)
+                .prefetch_related(None)
+                .order_by()
+                .values_list(Value(facet), value)
+                .annotate(count=Count("pk", distinct=True))
+            )
+
+        for facet, value, count in grouped[0].union(*grouped[1:], all=True):
+            if value is None:
+                continue
+            key = value == "1" if facet == "with_costs" else uuid.UUID(value)
+            counts[facet][key] = count
+        return counts
+
+    def label_facets(self):
+        """
+        Add the facet counts to the choice labels of the filter form.
+        """
+        counts = self.facet_counts
+        form = self.form
+
+        for facet in ("usage", "license", "dealer"):
+            field = form.fields[facet]
+            field.label_from_instance = (
+                lambda obj, facet_counts=counts[facet]: f"{obj} ({facet_counts.get(obj.pk, 0)})"
+            )
+
+        widget = form.fields["with_costs"].widget
+        widget.choices = [
+            (value, f"{label} ({counts['with_costs'].get(value == 'true', 0)})")
+            if value in ("true", "false") else (value, label)
+            for value, label in widget.choices
+        ]
+
     class Meta:
         model = Asset
         form = AssetFilterForm
@@ -1,4 +1,5 @@
 from django import forms
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 from crispy_forms.helper import FormHelper
@@ -43,8 +44,22 @@ class AssetFilterForm(forms.Form):
         self.helper = FormHelper()
         self.helper.form_id = 'asset-filter-form'
         self.helper.form_method = 'get'
+        # Update the results in place, see `views.asset_filter_list`
+        self.helper.attrs = {
+            'hx-get': reverse('core:asset-list'),
+            'hx-trigger': 'change, submit, keyup changed delay:500ms from:#id_title',
+            'hx-target': '#asset-results',
+            'hx-push-url': 'true',
+        }
         self.fields['license'].label = mark_safe('<i class="bi bi-signpost-split"></i> License')
         self.fields['usage'].label = mark_safe('<i class="bi bi-diagram-2-fill"></i> Usage')
+        self.fields['dealer'].label = mark_safe('<i class="bi bi-shop-window"></i> Dealer')
+        self.fields['with_costs'].label = mark_safe('<i class="bi bi-coin"></i> Paid for?')
+        self.fields['orientation'].label = mark_safe('<i class="bi bi-aspect-ratio"></i> Orientation')
+        self.fields['captured'].label = mark_safe('<i class="bi bi-camera"></i> Date taken')
+        for widget in self.fields['captured'].widget.widgets:
+            # Date inputs need ISO dates, whatever the locale
+            widget.format = '%Y-%m-%d'
         self.helper.layout = Layout(
             Div(
                 Field('title', wrapper_class='form-group col-md-4 pe-4'),
@@ -52,6 +67,19 @@ class AssetFilterForm(forms.Form):
                 InlineRadios('license', wrapper_class='form-group col-md-4 ps-4'),
                 css_class="row"
             ),
+            Div(
+                Field('dealer', wrapper_class='form-group col-md-4 pe-4'),
+                Field('with_costs', wrapper_class='form-group col-md-4 px-4'),
+                Field('sort', wrapper_class='form-group col-md-4 ps-4'),
+                css_class="row"
+            ),
+            Div(
+                InlineRadios('orientation', wrapper_class='form-group col-md-4 pe-4'),
+                Field('min_width', wrapper_class='form-group col-md-2 px-4'),
+                Field('min_height', wrapper_class='form-group col-md-2 px-4'),
+                Field('captured', wrapper_class='form-group col-md-4 ps-4'),
+                css_class="row"
+            ),
             HTML("""
             <button class="btn btn-primary"><i class="bi bi-search-heart-fill"></i> Search</button>
             """),
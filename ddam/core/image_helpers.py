@@ -1,92 +1,233 @@
+import hashlib
+import io
+import logging
 from pathlib import Path
 from collections import namedtuple
 from PIL import Image
 
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 
+from .storage import get_existing_names
 
-def get_media_path(givenpath):
-    givenpath = Path(givenpath)
-    return f"/{givenpath.relative_to(settings.MEDIA_ROOT.parent)}"
 
+logger = logging.getLogger(__name__)
 
-def get_or_create_rendition(image, filepath):
-    Rendition = namedtuple(
-        "Rendition",
-        "url width height"
-    )
+RenditionInfo = namedtuple(
+    "RenditionInfo",
+    "preset path width height format filesize source_width source_height",
+)
+
+RENDITION_FORMATS = {
+    # Pillow format: (file extension, mime type)
+    "WEBP": ("webp", "image/webp"),
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "SVG": ("svg", "image/svg+xml"),
+}
+
+
+def get_filelike_checksum(file_obj):
+    """
+    SHA-256 hex digest of a Django `File`, e.g. a not yet stored upload or
+    an opened stored file, read in chunks to keep memory flat.
+    """
+    checksum = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        checksum.update(chunk)
+    file_obj.seek(0)
+    return checksum.hexdigest()
+
+
+def get_image_dhash(image):
+    """
+    64 bit difference hash (dHash) of an image path or file object, or
+    `None` if Pillow can not read it. Each bit tells whether a pixel of a
+    9x8 grayscale thumbnail is brighter than its right neighbour, so
+    resized or recompressed copies of an image get the same or a close
+    hash, see `similarity.py`.
+    """
+    try:
+        with Image.open(image) as img:
+            return get_opened_image_dhash(img)
+    except (OSError, Image.DecompressionBombError):
+        return None
+    finally:
+        if hasattr(image, "seek"):
+            image.seek(0)
+
+
+def get_opened_image_dhash(img):
+    """
+    dHash of an opened Pillow image, see `get_image_dhash`. Decodes the
+    image, at a reduced scale where the format allows.
+    """
+    img.draft("L", (64, 64))
+    thumbnail = img.convert("L").resize((9, 8), Image.Resampling.BOX)
+
+    pixels = thumbnail.tobytes()
+    dhash = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            dhash = (dhash << 1) | (left > right)
+    return dhash
 
-    if Path(image).suffix.lower() == ".svg":
-        # Currently we bypass/ignore SVG files and do not
-        # generate a bitmap rendition for it.
-        rendition = Rendition(
-            get_media_path(image),
-            width=None,
-            height=None,
-        )
-
-    elif filepath.is_file():
-        # A rendition already exists, using this one
-        with Image.open(filepath) as img_in_buffer:
-            (width, height) = img_in_buffer.size
-
-            rendition = Rendition(
-                get_media_path(filepath),
-                width,
-                height,
-            )
-    else:
-        # No existing rendition found, generating a new one
-        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-        with open(image, 'rb') as img_in, open(filepath, 'wb') as img_out:
 
-            # https://pillow.readthedocs.io/en/stable/handbook/tutorial.html#create-jpeg-thumbnails
-            try:
-                with Image.open(img_in) as img_in_buffer:
-                    img_in_buffer.thumbnail(settings.DDAM_RENDITION_SIZE)
-                    img_in_buffer.save(img_out, "WEBP")
-                    (width, height) = img_in_buffer.size
+def get_rendition_presets():
+    """
+    Rendition presets as `(name, box size)`, largest first.
+    """
+    return sorted(
+        settings.DDAM_RENDITION_PRESETS.items(),
+        key=lambda preset: preset[1],
+        reverse=True,
+    )
 
-                    rendition = Rendition(
-                        get_media_path(img_out.name),
-                        width,
-                        height,
-                    )
-            except OSError:
-                print("Cannot create thumbnail for", img_in)
 
-    return rendition
+def _fit_size(size, box):
+    """
+    Fit `size` into a square `box`, never upscale.
+    """
+    width, height = size
+    scale = min(box / width, box / height, 1)
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
 
 
-def get_rendition_path(image_obj):
-    asset_path = Path(image_obj.name)
-    rendition_filename = f"{asset_path.name}.webp"
-    rendition_path = settings.DDAM_RENDITION_ROOT / rendition_filename
-    # Our image renditions are in webp image format:
-    rendition_path.with_suffix('.webp')
+def plan_renditions(source_size):
+    """
+    The `(preset, size)` renditions to generate for a source of
+    `source_size`, largest first. Each preset is fitted into the previous
+    one, just like `create_renditions` scales them down.
 
-    return rendition_path
+    Sources smaller than a preset box would give identical renditions for
+    several presets. Those get planned only once, named after the smallest
+    preset.
+    """
+    planned = []
+    preset_for_size = {}
+    size = source_size
+    for preset, box in get_rendition_presets():
+        size = _fit_size(size, box)
+        preset_for_size[size] = preset
+        planned.append((preset, size))
 
+    return [
+        (preset, size) for preset, size in planned
+        if preset_for_size[size] == preset
+    ]
 
-def get_rendition(image_obj):
-    rendition_path = get_rendition_path(image_obj)
-    rendition = get_or_create_rendition(image_obj.path, rendition_path)
 
-    return rendition
+def _flatten(img):
+    """
+    JPEG has no alpha channel: put transparent images on a white background.
+    """
+    if img.mode == "RGBA":
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img
 
 
-def delete_rendition(image_obj):
+def create_renditions(source, source_checksum, storage=None):
     """
-    We could not be sure if a rendition actually exists, so
-    we carefully delete only existing renditions.
+    Generate all rendition presets in all rendition formats for `source`,
+    an opened stored `File` named after its name in the storage, e.g.
+    `asset.file`, with the SHA-256 `source_checksum`, and return a list of
+    `RenditionInfo`. Returns an empty list if Pillow can not handle the
+    source file.
+
+    The source gets decoded only once. For JPEG sources Pillow's draft mode
+    already decodes at a reduced scale. Each preset is then scaled down from
+    the next larger one instead of from the full size original.
+
+    Renditions get encoded in memory and saved to `storage`,
+    `default_storage` by default, without temporary files. Renditions
+    already stored under their content addressed name are not saved again.
     """
-    deleted = False
-    rendition_path = get_rendition_path(image_obj)
+    if Path(source.name).suffix.lower() == ".svg":
+        # Currently we bypass/ignore SVG files and do not
+        # generate a bitmap rendition for it.
+        return [
+            RenditionInfo(
+                preset="",
+                path=source.name,
+                width=None,
+                height=None,
+                format="SVG",
+                filesize=source.size,
+                source_width=None,
+                source_height=None,
+            )
+        ]
+
+    storage = storage or default_storage
+    renditions = []
 
+    # https://pillow.readthedocs.io/en/stable/handbook/tutorial.html#create-jpeg-thumbnails
     try:
-        Path(rendition_path).unlink(missing_ok=False)
-        deleted = True
-    except FileNotFoundError:
-        pass
+        with Image.open(source) as img_in_buffer:
+            source_width, source_height = img_in_buffer.size
+            planned = plan_renditions(img_in_buffer.size)
+            _largest_preset, largest_size = planned[0]
+            img_in_buffer.draft(None, largest_size)
+
+            has_alpha = (
+                img_in_buffer.mode in ("RGBA", "LA", "PA")
+                or "transparency" in img_in_buffer.info
+            )
+            current = img_in_buffer.convert("RGBA" if has_alpha else "RGB")
+    except (OSError, Image.DecompressionBombError, ValueError):
+        logger.warning("Cannot create renditions for %s", source.name, exc_info=True)
+        return renditions
+
+    existing = get_existing_names(storage, [
+        get_rendition_path(source_checksum, size, image_format)
+        for _preset, size in planned
+        for image_format in settings.DDAM_RENDITION_FORMATS
+    ])
+
+    for preset, size in planned:
+        if size != current.size:
+            current = current.resize(size, Image.Resampling.LANCZOS)
+
+        for image_format in settings.DDAM_RENDITION_FORMATS:
+            rendition_path = get_rendition_path(source_checksum, size, image_format)
+            img_out = _flatten(current) if image_format == "JPEG" else current
+            buffer = io.BytesIO()
+            img_out.save(buffer, image_format)
+            if rendition_path not in existing:
+                saved_path = storage.save(rendition_path, ContentFile(buffer.getvalue()))
+                if saved_path != rendition_path:
+                    # Saved meanwhile by a concurrent worker, with the same content
+                    storage.delete(saved_path)
+
+            renditions.append(
+                RenditionInfo(
+                    preset=preset,
+                    path=rendition_path,
+                    width=current.width,
+                    height=current.height,
+                    format=image_format,
+                    filesize=buffer.getbuffer().nbytes,
+                    source_width=source_width,
+                    source_height=source_height,
+                )
+            )
 
-    return deleted
+    return renditions
+
+
+def get_rendition_path(source_checksum, size, image_format):
+    """
+    Content addressed rendition name in the storage:
+    `renditions/ab/abcdef….400x267.webp`. The same source at the same size
+    always maps to the same file, so identical uploads share their
+    renditions.
+    """
+    width, height = size
+    extension, _mime_type = RENDITION_FORMATS[image_format]
+    rendition_filename = f"{source_checksum}.{width}x{height}.{extension}"
+    return f"{settings.DDAM_RENDITION_DIR}/{source_checksum[:2]}/{rendition_filename}"
@@ -0,0 +1,201 @@
+"""
+Per-request instrumentation: database queries, template rendering,
+rendition and tile cache lookups.
+
+`ServerTimingMiddleware` collects the metrics of each request in a context
+variable and emits them as `Server-Timing` header, shown by the browser
+developer tools, as Prometheus metrics, see `metrics.py`, and as log line
+of the `ddam.core.instrumentation` logger: at INFO for every request, at
+WARNING for requests slower than `DDAM_SLOW_REQUEST_THRESHOLD` seconds.
+
+Code contributes via `record` and `timer`, both do nothing outside of a
+request. Queries are counted by a wrapper installed on each database
+connection, templates by the `DjangoTemplates` backend below.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+
+from .metrics import observe_request
+
+
+logger = logging.getLogger(__name__)
+
+# Metric names in the header and log line, with their header description
+METRICS = {
+    "db": "Database",
+    "template": "Templates",
+    "rendition": "Rendition generation",
+}
+
+_request_metrics = ContextVar("ddam_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Durations in seconds and counts of one request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.active = set()
+
+    def as_header(self, total):
+        entries = []
+        for name, description in METRICS.items():
+            if name in self.counts:
+                entries.append(
+                    f'{name};dur={self.durations[name] * 1000:.1f};desc="{description} ({self.counts[name]})"'
+                )
+        for name in ("rendition_hit", "rendition_miss", "tile_hit", "tile_miss"):
+            if name in self.counts:
+                entries.append(f'{name};desc="{self.counts[name]}"')
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def as_dict(self, total):
+        values = {"total_ms": round(total * 1000, 1)}
+        for name, count in self.counts.items():
+            values[f"{name}_count"] = count
+            if name in self.durations:
+                values[f"{name}_ms"] = round(self.durations[name] * 1000, 1)
+        return values
+
+
+def record(name, count=1, duration=None):
+    """
+    Add `count` to metric `name` of the current request, and `duration`
+    seconds if given.
+    """
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return
+    metrics.counts[name] += count
+    if duration is not None:
+        metrics.durations[name] += duration
+
+
+@contextmanager
+def timer(name):
+    """
+    Time the block as one `name` of the current request. Nested blocks of
+    the same name, like templates rendering templates, count once.
+    """
+    metrics = _request_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active.discard(name)
+        record(name, duration=time.perf_counter() - started)
+
+
+def _record_query(execute, sql, params, many, context):
+    if _request_metrics.get() is None:
+        return execute(sql, params, many, context)
+    with timer("db"):
+        return execute(sql, params, many, context)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # Sent on every reconnect of the same connection object, which keeps
+    # its wrappers
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid="instrumentation-query-wrapper")
+
+
+class TimedTemplate(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timer("template"):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """
+    The Django template backend, timing the rendering of each template.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    """
+    Put it first, to measure everything but itself.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        observe_request(request, response, metrics, total)
+        if settings.DDAM_SERVER_TIMING:
+            response["Server-Timing"] = metrics.as_header(total)
+
+        slow = total >= settings.DDAM_SLOW_REQUEST_THRESHOLD
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        values = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "slow": slow,
+            **metrics.as_dict(total),
+        }
+        logger.log(
+            level,
+            " ".join(f"{key}={value}" for key, value in values.items()),
+            extra={"request_metrics": values},
+        )
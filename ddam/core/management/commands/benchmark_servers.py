@@ -0,0 +1,147 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _session_cookie(email):
+    """
+    A session of `email` as if they logged in, so the benchmark hits the
+    same views as a browser does.
+    """
+    try:
+        user = get_user_model().objects.get(email=email)
+    except get_user_model().DoesNotExist:
+        raise CommandError(f"No user with email {email}")
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+
+async def _request(url, cookie, slow):
+    """
+    One HTTP/1.1 request on its own connection. A slow client sends the
+    request head in two parts `slow` seconds apart, like a mobile client
+    on a bad connection, and holds the server side of it meanwhile.
+    """
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    head = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"Cookie: {cookie}\r\n"
+        "Connection: close\r\n"
+    )
+    started = time.perf_counter()
+    try:
+        writer.write(head.encode())
+        await writer.drain()
+        if slow:
+            await asyncio.sleep(slow)
+        writer.write(b"\r\n")
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, time.perf_counter() - started
+
+
+async def _run(url, cookie, concurrency, requests, slow):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async def client():
+        for _ in remaining:
+            try:
+                status, latency = await _request(url, cookie, slow)
+            except OSError:
+                status, latency = 0, None
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of already running servers, e.g. the WSGI "
+        "app under gunicorn and the ASGI app under uvicorn, see README.md."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "servers",
+            nargs="+",
+            help="Base URLs of the servers, e.g. http://127.0.0.1:8001.",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, can be repeated (default: /core/).",
+        )
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Email of the user the requests are made as.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of concurrent clients.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Number of requests per server and path.",
+        )
+        parser.add_argument(
+            "--slow",
+            type=float,
+            default=0,
+            help="Seconds each client takes to send its request.",
+        )
+
+    def handle(self, *args, **options):
+        cookie = _session_cookie(options["user"])
+        for path in options["paths"] or ["/core/"]:
+            for server in options["servers"]:
+                url = server.rstrip("/") + path
+                # Warm up caches and connections
+                asyncio.run(_run(url, cookie, 1, 3, 0))
+                latencies, statuses, elapsed = asyncio.run(_run(
+                    url, cookie, options["concurrency"], options["requests"], options["slow"]
+                ))
+                failed = sum(count for status, count in statuses.items() if status != 200)
+                if not latencies:
+                    self.stderr.write(f"[!] {url}: no successful requests {statuses}")
+                    continue
+                self.stdout.write(
+                    f"{url}: {len(latencies) / elapsed:.1f} req/s, "
+                    f"latency p50 {statistics.median(latencies) * 1000:.0f}ms "
+                    f"p95 {_percentile(latencies, 95) * 1000:.0f}ms "
+                    f"p99 {_percentile(latencies, 99) * 1000:.0f}ms, "
+                    f"{failed} failed"
+                )
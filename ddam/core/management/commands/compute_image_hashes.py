@@ -0,0 +1,80 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ddam.core.image_helpers import get_image_dhash
+from ddam.core.models import Asset
+
+
+DHASH_FIELDS = ["dhash", "dhash_0", "dhash_1", "dhash_2", "dhash_3"]
+
+
+def _hash_asset(asset):
+    """
+    Runs in a pool thread, Pillow releases the GIL while decoding.
+    """
+    try:
+        with asset.file.open("rb") as source:
+            return asset, get_image_dhash(source)
+    except (FileNotFoundError, ValueError):
+        return asset, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the perceptual hashes of assets uploaded before near-duplicate "
+        "detection existed, see ddam/core/similarity.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker threads (default: number of CPUs).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute all hashes, not only missing ones.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Assets per UPDATE batch.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Asset.objects.only("id", "file").order_by("created_at", "id")
+        if not options["force"]:
+            queryset = queryset.filter(dhash__isnull=True)
+
+        hashed = failed = 0
+        batch = []
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            for asset, dhash in executor.map(_hash_asset, queryset.iterator(chunk_size=options["batch_size"])):
+                if dhash is None:
+                    failed += 1
+                    if options["verbosity"] > 1:
+                        self.stderr.write(f"[!] {asset.pk} {asset.file.name}: not a readable image")
+                    continue
+
+                asset.set_dhash(dhash)
+                batch.append(asset)
+                if len(batch) >= options["batch_size"]:
+                    Asset.objects.bulk_update(batch, DHASH_FIELDS)
+                    hashed += len(batch)
+                    batch = []
+
+        Asset.objects.bulk_update(batch, DHASH_FIELDS)
+        hashed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Hashed {hashed} assets, {failed} without a readable image "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
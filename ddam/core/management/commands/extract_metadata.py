@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ddam.core.metadata import get_image_metadata
+from ddam.core.models import Asset
+
+
+METADATA_FIELDS = [
+    "file_size",
+    "width",
+    "height",
+    "orientation",
+    "image_format",
+    "color_mode",
+    "captured_at",
+    "camera",
+    "creator",
+    "embedded_copyright",
+    "metadata",
+]
+
+
+def _read_asset(asset):
+    """
+    Runs in a pool thread. Only the file headers get read.
+    """
+    try:
+        with asset.file.open("rb") as source:
+            return asset, source.size, get_image_metadata(source)
+    except (FileNotFoundError, ValueError):
+        return asset, None, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract the technical and embedded metadata (EXIF, IPTC, XMP) of "
+        "assets uploaded before it was stored, see ddam/core/metadata.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker threads (default: number of CPUs).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Extract the metadata of all assets, not only of those without.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Assets per UPDATE batch.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Asset.objects.only("id", "file").order_by("created_at", "id")
+        if not options["force"]:
+            queryset = queryset.filter(file_size=0)
+
+        extracted = missing = unreadable = 0
+        batch = []
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            for asset, file_size, metadata in executor.map(_read_asset, queryset.iterator(chunk_size=options["batch_size"])):
+                if file_size is None:
+                    missing += 1
+                    self.stderr.write(f"[!] {asset.pk} {asset.file.name}: file not found")
+                    continue
+                if metadata is None:
+                    unreadable += 1
+                    if options["verbosity"] > 1:
+                        self.stderr.write(f"[!] {asset.pk} {asset.file.name}: not a readable image")
+
+                asset.set_metadata(metadata, file_size)
+                batch.append(asset)
+                if len(batch) >= options["batch_size"]:
+                    self.save_batch(batch)
+                    extracted += len(batch)
+                    batch = []
+
+        self.save_batch(batch)
+        extracted += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Extracted metadata of {extracted} assets, {unreadable} without a "
+            f"readable image, {missing} files missing in {time.monotonic() - started:.1f}s."
+        ))
+
+    def save_batch(self, batch):
+        # Reindexes the assets as well, embedded creator and copyright are
+        # searchable
+        Asset.objects.bulk_update(batch, METADATA_FIELDS)
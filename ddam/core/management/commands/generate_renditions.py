@@ -0,0 +1,217 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.dateparse import parse_date
+
+from ddam.core.image_helpers import create_renditions, get_filelike_checksum
+from ddam.core.models import Asset, Rendition
+from ddam.core.storage import open_stored_file
+
+
+def _render_asset(asset_id, name, stored_checksum=None):
+    """
+    Runs in a pool worker process: generate the renditions of one asset,
+    its file being `name` in the media storage. Only file work happens
+    here, the database is written by the parent.
+
+    If `stored_checksum` is given and still matches the source, the
+    stored renditions are current and nothing gets generated.
+    """
+    started = time.monotonic()
+    try:
+        with open_stored_file(name) as source:
+            source_bytes = source.size
+            checksum = get_filelike_checksum(source)
+            if stored_checksum and stored_checksum == checksum:
+                rendition_infos = None
+            else:
+                rendition_infos = create_renditions(source, checksum)
+                if not rendition_infos:
+                    raise ValueError("Unsupported or corrupt image file")
+    except Exception as error:
+        return asset_id, None, None, 0, time.monotonic() - started, f"{error}"
+
+    return asset_id, rendition_infos, checksum, source_bytes, time.monotonic() - started, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate missing or stale image renditions, fanned out over a "
+        "process pool. Progress is committed per asset, so an interrupted "
+        "run just continues where it stopped when started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPUs).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate all renditions, not only missing or stale ones, and retry failed ones.",
+        )
+        parser.add_argument(
+            "--verify-checksums",
+            action="store_true",
+            help="Also treat renditions as stale if the source file changed. Reads every source file.",
+        )
+        parser.add_argument(
+            "--id",
+            action="append",
+            dest="ids",
+            default=[],
+            help="Only process the asset with this id. Can be given multiple times.",
+        )
+        parser.add_argument(
+            "--created-after",
+            type=parse_date,
+            help="Only process assets created on or after this date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--created-before",
+            type=parse_date,
+            help="Only process assets created before this date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--title",
+            help="Only process assets whose title contains this string.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Process at most this many assets.",
+        )
+
+    def get_queryset(self, options):
+        queryset = Asset.objects.prefetch_related("renditions").order_by("created_at", "id")
+
+        if options["ids"]:
+            queryset = queryset.filter(id__in=options["ids"])
+        if options["created_after"]:
+            queryset = queryset.filter(created_at__date__gte=options["created_after"])
+        if options["created_before"]:
+            queryset = queryset.filter(created_at__date__lt=options["created_before"])
+        if options["title"]:
+            queryset = queryset.filter(title__icontains=options["title"])
+
+        return queryset
+
+    def get_jobs(self, queryset, options):
+        """
+        Yield `(asset, stored_checksum)` for every asset to process.
+        """
+        for asset in queryset.iterator(chunk_size=500):
+            renditions = asset.get_image_renditions
+
+            if options["force"] or renditions is None or renditions.is_stale:
+                if not options["force"] and asset.renditions_failed:
+                    continue
+                yield asset, None
+            elif options["verify_checksums"]:
+                yield asset, renditions.renditions[0].source_checksum
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        max_pending = workers * 4
+        limit = options["limit"]
+
+        processed = unchanged = 0
+        source_bytes = 0
+        failures = []
+        started = time.monotonic()
+
+        jobs = self.get_jobs(self.get_queryset(options), options)
+        pending = {}
+
+        # Do not hand open database connections to forked workers
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            submitted = 0
+            exhausted = False
+
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending:
+                    if limit is not None and submitted >= limit:
+                        exhausted = True
+                        break
+                    try:
+                        asset, stored_checksum = next(jobs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    if (
+                        not options["force"]
+                        and stored_checksum is None
+                        and asset.checksum
+                        and Rendition.copy_from_duplicate(asset, asset.checksum)
+                    ):
+                        # Identical file, renditions already generated
+                        processed += 1
+                        continue
+
+                    future = executor.submit(
+                        _render_asset,
+                        str(asset.pk),
+                        asset.file.name,
+                        stored_checksum,
+                    )
+                    pending[future] = asset
+                    submitted += 1
+
+                if not pending:
+                    break
+
+                done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    asset = pending.pop(future)
+                    _asset_id, rendition_infos, checksum, asset_bytes, duration, error = future.result()
+
+                    if error:
+                        Asset.objects.filter(pk=asset.pk).update(rendition_failed_checksum=asset.checksum)
+                        failures.append((asset, error))
+                        self.stderr.write(f"[!] {asset.pk} {asset.file.name}: {error}")
+                        continue
+
+                    if rendition_infos is None:
+                        unchanged += 1
+                    else:
+                        Rendition.store_for_asset(asset, rendition_infos, checksum)
+                        processed += 1
+                        source_bytes += asset_bytes
+
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"{asset.pk} {asset.file.name} ({duration:.2f}s)")
+
+                    done_count = processed + unchanged
+                    if options["verbosity"] > 0 and done_count % 100 == 0:
+                        self.stdout.write(self.format_stats(done_count, source_bytes, started))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated renditions for {processed} assets, "
+            f"{unchanged} unchanged, {len(failures)} failed "
+            f"in {elapsed:.1f}s with {workers} workers. "
+            f"{self.format_stats(processed, source_bytes, started)}"
+        ))
+
+        if failures:
+            self.stderr.write(self.style.ERROR(f"{len(failures)} failures:"))
+            for asset, error in failures:
+                self.stderr.write(f"  {asset.pk} {asset.file.name}: {error}")
+
+    def format_stats(self, count, source_bytes, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        return (
+            f"{count} images, "
+            f"{count / elapsed:.1f} images/s, "
+            f"{source_bytes / 1_000_000 / elapsed:.2f} MB/s"
+        )
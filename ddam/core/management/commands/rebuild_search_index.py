@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ddam.core.search import is_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text search index of all assets, e.g. after bulk "
+        "changes done with queryset updates or raw SQL."
+    )
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stderr.write("Full-text search is not supported by this database, nothing to do.")
+            return
+
+        started = time.monotonic()
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} assets in {time.monotonic() - started:.1f}s."
+        ))
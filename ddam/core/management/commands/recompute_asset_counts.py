@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ddam.core.models import Dealer, License, Usage
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized asset counts of all usages, licenses and dealers."
+
+    def handle(self, *args, **options):
+        for model in (Usage, License, Dealer):
+            updated = model.update_asset_counts()
+            self.stdout.write(f"{model.model_verbose_name_plural()}: {updated} recounted")
+
+        self.stdout.write(self.style.SUCCESS("Asset counts are up to date."))
@@ -0,0 +1,84 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ddam.core.benchmarks import BenchmarkError, compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot paths against the current database and write the "
+        "results as JSON, see ddam/core/benchmarks.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=10,
+            help="Timed runs per benchmark (default: 10).",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Run only benchmarks starting with this name, e.g. filter. Can be repeated.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user pages get rendered for (default: anonymous).",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the results as JSON to this file.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON results of an earlier run to compare with.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(email=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        before = None
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                before = json.load(file)
+
+        def report(name, result):
+            self.stdout.write(
+                f"{name:<36} median {result['median_ms']:>9.2f}ms  "
+                f"min {result['min_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                f"{result['queries']:>3} queries"
+            )
+
+        try:
+            results = run_benchmarks(
+                max(1, options["runs"]),
+                only=options["only"],
+                user=user,
+                report=report,
+            )
+        except BenchmarkError as error:
+            raise CommandError(error)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+                file.write("\n")
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if before:
+            self.stdout.write(f"\nCompared to {before.get('commit') or options['compare']}:")
+            for name, before_ms, after_ms, change in compare_results(before, results):
+                line = f"{name:<36} {before_ms:>9.2f}ms -> {after_ms:>9.2f}ms  {change:+.0%}"
+                if change > 0.1:
+                    line = self.style.WARNING(line)
+                elif change < -0.1:
+                    line = self.style.SUCCESS(line)
+                self.stdout.write(line)
@@ -0,0 +1,194 @@
+import hashlib
+import io
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import ExifTags, Image, ImageDraw
+
+from ddam.core.image_helpers import get_opened_image_dhash
+from ddam.core.metadata import read_image_metadata
+from ddam.core.models import Asset, Dealer, License, Usage, asset_upload_to
+from ddam.core.search import index_assets
+
+
+# Titles of seeded objects start with it, to tell them from real ones
+TITLE_PREFIX = "Benchmark"
+
+USAGE_COUNT = 12
+LICENSE_COUNT = 8
+DEALER_COUNT = 40
+
+_CAMERAS = [("Canon", "Canon EOS R5"), ("NIKON CORPORATION", "NIKON Z 6"), ("FUJIFILM", "X-T4"), ("Apple", "iPhone 13")]
+
+
+def _parse_size(value):
+    try:
+        width, height = (int(side) for side in value.lower().split("x"))
+    except ValueError:
+        raise CommandError(f"Invalid size {value}, expected e.g. 320x240")
+    return width, height
+
+
+def _make_image(number, size):
+    """
+    A small, unique, real image: a random gradient with some shapes, in
+    landscape, portrait or square format. Most are JPEGs with EXIF data,
+    some PNGs. Returns `(extension, bytes)`.
+    """
+    rng = random.Random(number)
+    width, height = size
+    width, height = rng.choice([(width, height), (height, width), (height, height)])
+
+    gradient = Image.linear_gradient("L").resize((width, height)).rotate(rng.randrange(360))
+    img = Image.merge("RGB", [gradient.point(lambda value, factor=rng.random(): value * factor) for _ in range(3)])
+    draw = ImageDraw.Draw(img)
+    for _ in range(rng.randint(2, 6)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        box = [x, y, x + rng.randrange(1, width), y + rng.randrange(1, height)]
+        draw.ellipse(box, fill=tuple(rng.randrange(256) for _ in range(3)))
+
+    output = io.BytesIO()
+    if rng.random() < 0.1:
+        img.save(output, "PNG")
+        return "png", output.getvalue()
+
+    exif = Image.Exif()
+    make, model = rng.choice(_CAMERAS)
+    exif[ExifTags.Base.Make] = make
+    exif[ExifTags.Base.Model] = model
+    exif[ExifTags.Base.Artist] = f"{TITLE_PREFIX} Photographer {rng.randrange(20)}"
+    captured_at = datetime(2015, 1, 1) + timedelta(seconds=rng.randrange(10 * 365 * 24 * 3600))
+    exif[ExifTags.Base.DateTime] = captured_at.strftime("%Y:%m:%d %H:%M:%S")
+    img.save(output, "JPEG", quality=85, exif=exif)
+    return "jpg", output.getvalue()
+
+
+def _build_asset(number, size, related):
+    """
+    Runs in a pool thread: generate the image, store it content addressed
+    and return the unsaved asset with its usages.
+    """
+    extension, data = _make_image(number, size)
+    rng = random.Random(number)
+    usages, licenses, dealers = related
+
+    asset = Asset(
+        title=f"{TITLE_PREFIX} asset {number:06d}",
+        filename_orig=f"benchmark-{number:06d}.{extension}",
+        description=f"Seeded for benchmarks, number {number}.",
+        license=rng.choice(licenses + [None]),
+        dealer=rng.choice(dealers + [None]),
+        with_costs=rng.random() < 0.3,
+        copyright_statement=f"{TITLE_PREFIX} Agency {rng.randrange(10)}",
+        created_by="benchmark@example.org",
+    )
+    asset.checksum = hashlib.sha256(data).hexdigest()
+    asset.file.name = asset_upload_to(asset, asset.filename_orig)
+
+    if not default_storage.exists(asset.file.name):
+        default_storage.save(asset.file.name, ContentFile(data))
+
+    with Image.open(io.BytesIO(data)) as img:
+        metadata = read_image_metadata(img)
+        asset.set_dhash(get_opened_image_dhash(img))
+    asset.set_metadata(metadata, len(data))
+
+    return asset, rng.sample(usages, rng.randint(0, 3))
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic catalogue for benchmarks: assets with real small "
+        "images, usages, licenses and dealers. Run against a dedicated "
+        "database, see ddam/core/benchmarks.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--assets",
+            type=int,
+            default=1000,
+            help="Number of seeded assets to have, e.g. 1000, 10000 or 100000. Existing ones are kept.",
+        )
+        parser.add_argument(
+            "--size",
+            default="320x240",
+            help="Size of the generated images (default: 320x240).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker threads (default: number of CPUs).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Assets per INSERT batch.",
+        )
+
+    def handle(self, *args, **options):
+        size = _parse_size(options["size"])
+        related = self.seed_related()
+
+        existing = Asset.objects.filter(title__startswith=f"{TITLE_PREFIX} asset ").count()
+        numbers = range(existing, options["assets"])
+        if not numbers:
+            self.stdout.write(f"{existing} seeded assets exist already.")
+            return
+
+        started = time.monotonic()
+        batch = []
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            for built in executor.map(lambda number: _build_asset(number, size, related), numbers):
+                batch.append(built)
+                if len(batch) >= options["batch_size"]:
+                    self.save_batch(batch)
+                    batch = []
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"{Asset.objects.count()} assets")
+        self.save_batch(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(numbers)} assets in {time.monotonic() - started:.1f}s. "
+            "Generate their renditions with ./manage.py generate_renditions."
+        ))
+
+    def seed_related(self):
+        usages = [
+            Usage.objects.get_or_create(
+                title=f"{TITLE_PREFIX} usage {number}",
+                defaults={"media": random.Random(number).choice(Usage.MediaChoices.values)},
+            )[0]
+            for number in range(USAGE_COUNT)
+        ]
+        licenses = [
+            License.objects.get_or_create(title=f"{TITLE_PREFIX} license {number}")[0]
+            for number in range(LICENSE_COUNT)
+        ]
+        dealers = [
+            Dealer.objects.get_or_create(title=f"{TITLE_PREFIX} dealer {number}")[0]
+            for number in range(DEALER_COUNT)
+        ]
+        return usages, licenses, dealers
+
+    def save_batch(self, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            assets = Asset.objects.bulk_create([asset for asset, _usages in batch])
+            Asset.usage.through.objects.bulk_create([
+                Asset.usage.through(asset_id=asset.pk, usage_id=usage.pk)
+                for asset, usages in batch
+                for usage in usages
+            ])
+            Usage.update_asset_counts({usage.pk for _asset, usages in batch for usage in usages})
+        index_assets([asset.pk for asset in assets])
@@ -0,0 +1,268 @@
+"""
+Serving of uploaded media files: originals and renditions.
+
+The view checks permissions, the transfer itself is left to the web server
+if configured via `DDAM_MEDIA_SENDFILE`:
+
+* `nginx`: `X-Accel-Redirect` to `DDAM_MEDIA_ACCEL_LOCATION`, an
+  `internal` location aliasing `MEDIA_ROOT`.
+* `apache`: `X-Sendfile` with the absolute path, see mod_xsendfile.
+
+Otherwise files get streamed by Django, supporting single byte ranges.
+Under ASGI the file is read chunk by chunk in the blocking pool, see
+`blocking.py`, Django would read synchronous file iterators into memory
+as a whole.
+
+With an object storage, see `s3.py`, nothing gets transferred by Django:
+the view redirects to a presigned URL of the object. It is cached for
+half of its validity, so browsers see the same URL and cache the file.
+"""
+
+import hashlib
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation, SuspiciousOperation
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+from .blocking import run_blocking
+from .storage import is_local_storage
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Content addressed files are named after their SHA-256, see
+# `asset_upload_to` and `get_rendition_path`
+CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{64}(\.\d+x\d+)?\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+SIGNED_URL_CACHE_KEY = "ddam:signed-media:{digest}"
+
+
+def normalize_media_path(path):
+    """
+    The media file `path` of a URL, without `.` and empty segments. Raises
+    `Http404` for absolute paths and `..` segments: resolved later they
+    could lead out of a public prefix like `branding/`. Check and serve
+    only the normalized path.
+    """
+    if path.startswith("/") or ".." in path.split("/"):
+        raise Http404("Invalid path")
+    path = posixpath.normpath(path)
+    if path == ".":
+        raise Http404("Invalid path")
+    return path
+
+
+def is_public_media(path):
+    """
+    Whether the normalized `path` is served without login.
+    """
+    return any(path.startswith(prefix) for prefix in settings.DDAM_MEDIA_PUBLIC_PREFIXES)
+
+
+def parse_range(header, size):
+    """
+    `(start, end)` of a single byte range, `end` inclusive, or `None` if
+    there is no usable range, i.e. the whole file gets sent. Raises
+    `ValueError` for unsatisfiable ranges.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        # Missing, malformed or multiple ranges
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last n bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+async def _aread_range(path, start, end):
+    f = await run_blocking(open, path, "rb")
+    try:
+        await run_blocking(f.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = await run_blocking(f.read, min(STREAM_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def _stat_media(path):
+    """
+    The absolute path and `os.stat_result` of the media file at `path`,
+    relative to `MEDIA_ROOT`.
+    """
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path")
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found")
+    if not fullpath.is_file():
+        raise Http404("File not found")
+    return fullpath, stat
+
+
+def get_signed_url(path):
+    """
+    Presigned URL of the media file at `path` in the object storage,
+    reused for half of its validity.
+    """
+    cache_key = SIGNED_URL_CACHE_KEY.format(digest=hashlib.sha256(path.encode()).hexdigest())
+    url = cache.get(cache_key)
+    if url is not None:
+        return url
+
+    parameters = {}
+    if CONTENT_ADDRESSED_RE.match(Path(path).name):
+        parameters["ResponseCacheControl"] = IMMUTABLE_CACHE_CONTROL
+    if mimetypes.guess_type(path)[0] == "image/svg+xml":
+        # Uploaded SVGs may contain scripts: download them when opened
+        # directly, `<img>` never runs them
+        parameters["ResponseContentDisposition"] = "attachment"
+
+    expire = settings.DDAM_S3_SIGNED_URL_EXPIRE
+    try:
+        url = default_storage.signed_url(path, parameters=parameters, expire=expire)
+    except SuspiciousOperation:
+        raise Http404("Invalid path")
+    cache.set(cache_key, url, expire // 2)
+    return url
+
+
+def _redirect_response(path):
+    response = HttpResponseRedirect(get_signed_url(path))
+    # Not longer than the cached URL is valid for sure
+    response["Cache-Control"] = f"private, max-age={settings.DDAM_S3_SIGNED_URL_EXPIRE // 2}"
+    return response
+
+
+def media_response(request, path):
+    """
+    The response for the media file at `path` in the media storage.
+    """
+    if not is_local_storage():
+        return _redirect_response(path)
+    fullpath, stat = _stat_media(path)
+    return _media_response(request, path, fullpath, stat, asynchronous=False)
+
+
+async def amedia_response(request, path):
+    """
+    Async version of `media_response`, streaming via the blocking pool.
+    """
+    if not is_local_storage():
+        return await run_blocking(_redirect_response, path)
+    fullpath, stat = await run_blocking(_stat_media, path)
+    return _media_response(request, path, fullpath, stat, asynchronous=True)
+
+
+def _media_response(request, path, fullpath, stat, asynchronous):
+    last_modified = http_date(stat.st_mtime)
+    immutable = bool(CONTENT_ADDRESSED_RE.match(fullpath.name))
+
+    if not immutable and not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, encoding = mimetypes.guess_type(fullpath.name)
+    content_type = content_type or "application/octet-stream"
+
+    sendfile = settings.DDAM_MEDIA_SENDFILE
+    if sendfile == "nginx":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(f"{settings.DDAM_MEDIA_ACCEL_LOCATION}{path}")
+    elif sendfile == "apache":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = str(fullpath)
+    else:
+        response = _streaming_response(request, fullpath, stat.st_size, content_type, last_modified, asynchronous)
+
+    response["Last-Modified"] = last_modified
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if content_type == "image/svg+xml":
+        # Uploaded SVGs may contain scripts, never run them
+        response["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    return response
+
+
+def _streaming_response(request, fullpath, size, content_type, last_modified, asynchronous):
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and if_range and parse_http_date_safe(if_range) != parse_http_date_safe(last_modified):
+        # The client's copy is outdated, send the whole file
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None and not asynchronous:
+        response = FileResponse(open(fullpath, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range or (0, size - 1)
+        read_range = _aread_range if asynchronous else _read_range
+        response = StreamingHttpResponse(
+            read_range(fullpath, start, end),
+            status=200 if byte_range is None else 206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = end - start + 1
+        if byte_range is not None:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,208 @@
+"""
+Technical and descriptive metadata of image files: dimensions, format,
+colour mode and the embedded EXIF, IPTC and XMP data.
+
+Everything is read from the file headers, Pillow does not decode any
+pixels for it. Uploads get it extracted while being validated, see
+`validators.probe_file`, stored assets via
+
+    ./manage.py extract_metadata
+"""
+
+import html
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from django.utils import timezone as django_timezone
+from PIL import ExifTags, Image, IptcImagePlugin
+
+
+ImageMetadata = namedtuple(
+    "ImageMetadata",
+    "format width height color_mode captured_at camera creator copyright details",
+)
+
+EMPTY_METADATA = ImageMetadata(
+    format="",
+    width=None,
+    height=None,
+    color_mode="",
+    captured_at=None,
+    camera="",
+    creator="",
+    copyright="",
+    details={},
+)
+
+SVG_METADATA = EMPTY_METADATA._replace(format="SVG")
+
+# Max. length of the text columns on `Asset`
+MAX_TEXT_LENGTH = 255
+
+# EXIF orientations rotating the image by 90 or 270 degrees
+_ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+_EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+
+# IPTC IIM datasets
+_IPTC_BYLINE = (2, 80)
+_IPTC_COPYRIGHT = (2, 116)
+_IPTC_DATE_CREATED = (2, 55)
+
+# Additional EXIF values shown on the asset page, as (name, tag)
+_EXIF_DETAILS = [
+    ("lens", ExifTags.Base.LensModel),
+    ("exposure_time", ExifTags.Base.ExposureTime),
+    ("f_number", ExifTags.Base.FNumber),
+    ("iso", ExifTags.Base.ISOSpeedRatings),
+    ("focal_length", ExifTags.Base.FocalLength),
+    ("software", ExifTags.Base.Software),
+]
+
+
+def _text(value):
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else ""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="replace")
+    if not isinstance(value, str):
+        return ""
+    return " ".join(value.replace("\x00", " ").split())[:MAX_TEXT_LENGTH]
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return round(number, 6) if number == number else None  # NaN for 0/0 rationals
+
+
+def _parse_exif_datetime(value, offset=""):
+    try:
+        captured_at = datetime.strptime(_text(value), _EXIF_DATE_FORMAT)
+    except ValueError:
+        # Missing or a placeholder like "0000:00:00 00:00:00"
+        return None
+
+    match = re.fullmatch(r"([+-])(\d{2}):(\d{2})", _text(offset))
+    if match:
+        sign, hours, minutes = match.groups()
+        delta = timedelta(hours=int(hours), minutes=int(minutes))
+        return captured_at.replace(tzinfo=timezone(-delta if sign == "-" else delta))
+    # Cameras without an offset tag record local time
+    return django_timezone.make_aware(captured_at)
+
+
+def _parse_iptc_date(value):
+    try:
+        return django_timezone.make_aware(datetime.strptime(_text(value), "%Y%m%d"))
+    except ValueError:
+        return None
+
+
+def _xmp_values(xmp, element):
+    """
+    The text of an XMP element, either direct or the items of its RDF
+    container, e.g. `<dc:creator><rdf:Seq><rdf:li>Name</rdf:li>…`.
+    """
+    match = re.search(rf"<{element}\b[^>]*>(.*?)</{element}>", xmp, re.DOTALL)
+    if not match:
+        return []
+    content = match.group(1)
+    items = re.findall(r"<rdf:li\b[^>]*>(.*?)</rdf:li>", content, re.DOTALL) or [content]
+    return [html.unescape(item.strip()) for item in items if item.strip()]
+
+
+def _read_xmp(img):
+    xmp = img.info.get("xmp") or img.info.get("XML:com.adobe.xmp") or b""
+    if isinstance(xmp, bytes):
+        xmp = xmp.decode("utf-8", errors="replace")
+    return xmp
+
+
+def read_image_metadata(img):
+    """
+    The `ImageMetadata` of an opened, not yet loaded Pillow image.
+
+    Embedded creator and copyright are taken from EXIF, then IPTC, then
+    XMP, the capture date from EXIF, then IPTC. Width and height are the
+    ones the image is displayed with, swapped if EXIF says it is rotated.
+    """
+    exif = img.getexif()
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    try:
+        iptc = IptcImagePlugin.getiptcinfo(img) or {}
+    except (OSError, SyntaxError):
+        iptc = {}
+    xmp = _read_xmp(img)
+
+    width, height = img.size
+    if exif.get(ExifTags.Base.Orientation) in _ROTATED_ORIENTATIONS:
+        width, height = height, width
+
+    captured_at = (
+        _parse_exif_datetime(
+            exif_ifd.get(ExifTags.Base.DateTimeOriginal),
+            exif_ifd.get(ExifTags.Base.OffsetTimeOriginal),
+        )
+        or _parse_exif_datetime(exif.get(ExifTags.Base.DateTime))
+        or _parse_iptc_date(iptc.get(_IPTC_DATE_CREATED))
+    )
+
+    make = _text(exif.get(ExifTags.Base.Make))
+    model = _text(exif.get(ExifTags.Base.Model))
+    # Models often repeat the make, e.g. "Canon" "Canon EOS R5"
+    camera = model if make and model.startswith(make) else " ".join(filter(None, [make, model]))
+
+    creator = (
+        _text(exif.get(ExifTags.Base.Artist))
+        or _text(iptc.get(_IPTC_BYLINE))
+        or _text(", ".join(_xmp_values(xmp, "dc:creator")))
+    )
+    copyright = (
+        _text(exif.get(ExifTags.Base.Copyright))
+        or _text(iptc.get(_IPTC_COPYRIGHT))
+        or _text(" ".join(_xmp_values(xmp, "dc:rights")))
+    )
+
+    details = {}
+    for name, tag in _EXIF_DETAILS:
+        value = exif_ifd.get(tag, exif.get(tag))
+        if value is None:
+            continue
+        value = _text(value) if name in ("lens", "software") else _number(value)
+        if value:
+            details[name] = value
+
+    return ImageMetadata(
+        format=img.format or "",
+        width=width,
+        height=height,
+        color_mode=img.mode,
+        captured_at=captured_at,
+        camera=camera[:MAX_TEXT_LENGTH],
+        creator=creator,
+        copyright=copyright,
+        details=details,
+    )
+
+
+def get_image_metadata(image):
+    """
+    The `ImageMetadata` of an image path or file object, `None` if Pillow
+    can not read it.
+    """
+    if Path(getattr(image, "name", image)).suffix.lower() == ".svg":
+        return SVG_METADATA
+
+    try:
+        with Image.open(image) as img:
+            return read_image_metadata(img)
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        return None
+    finally:
+        if hasattr(image, "seek"):
+            image.seek(0)
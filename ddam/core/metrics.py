@@ -0,0 +1,124 @@
+"""
+Prometheus metrics of requests, uploads and renditions, served as
+`/metrics` in the Prometheus text format.
+
+Web workers and the tasks worker are separate processes. prometheus_client
+runs in multiprocess mode: each process writes its values to files in
+`PROMETHEUS_MULTIPROC_DIR`, see the settings, and `/metrics` sums them up.
+Empty the directory when (re)starting the application.
+
+Access is granted by the bearer token `DDAM_METRICS_TOKEN` or to the
+addresses in `DDAM_METRICS_ALLOWED_IPS`, nobody else.
+"""
+
+import ipaddress
+from functools import cache
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+
+REQUEST_DURATION = Histogram(
+    "ddam_request_duration_seconds",
+    "Time to respond, by URL name.",
+    ["view", "method"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "ddam_requests",
+    "Responses, by URL name and status class.",
+    ["view", "method", "status"],
+)
+DB_QUERIES = Counter(
+    "ddam_db_queries",
+    "Database queries of requests, by URL name.",
+    ["view"],
+)
+DB_QUERY_SECONDS = Counter(
+    "ddam_db_query_seconds",
+    "Time spent in database queries of requests, by URL name.",
+    ["view"],
+)
+RENDITION_LOOKUPS = Counter(
+    "ddam_rendition_lookups",
+    "Listed assets by whether their renditions were current (hit) or got queued (miss).",
+    ["result"],
+)
+TILE_CACHE_LOOKUPS = Counter(
+    "ddam_tile_cache_lookups",
+    "Asset grid tiles by whether they were cached (hit) or rendered (miss).",
+    ["result"],
+)
+RENDITION_GENERATIONS = Counter(
+    "ddam_rendition_generations",
+    "Assets renditions got generated for, by the tasks worker.",
+    ["result"],
+)
+RENDITION_GENERATION_DURATION = Histogram(
+    "ddam_rendition_generation_seconds",
+    "Time to generate all renditions of an asset.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPLOADS = Counter(
+    "ddam_uploads",
+    "Validated uploaded files, accepted or rejected.",
+    ["result"],
+)
+UPLOAD_BYTES = Counter(
+    "ddam_upload_bytes",
+    "Bytes of accepted uploaded files.",
+)
+UPLOAD_REJECTIONS = Counter(
+    "ddam_upload_rejections",
+    "Rejected uploaded files, by validation error code.",
+    ["reason"],
+)
+
+
+def observe_request(request, response, request_metrics, duration):
+    """
+    Called by `instrumentation.ServerTimingMiddleware` with the collected
+    `RequestMetrics` of each request.
+    """
+    resolver_match = getattr(request, "resolver_match", None)
+    # URL names, not paths: their number is bounded
+    view = resolver_match.view_name if resolver_match else "unresolved"
+
+    REQUEST_DURATION.labels(view, request.method).observe(duration)
+    REQUESTS.labels(view, request.method, f"{response.status_code // 100}xx").inc()
+
+    counts, durations = request_metrics.counts, request_metrics.durations
+    if "db" in counts:
+        DB_QUERIES.labels(view).inc(counts["db"])
+        DB_QUERY_SECONDS.labels(view).inc(durations["db"])
+    for name, counter in (("rendition", RENDITION_LOOKUPS), ("tile", TILE_CACHE_LOOKUPS)):
+        for result in ("hit", "miss"):
+            if counts.get(f"{name}_{result}"):
+                counter.labels(result).inc(counts[f"{name}_{result}"])
+
+
+@cache
+def _allowed_networks():
+    return [ipaddress.ip_network(address, strict=False) for address in settings.DDAM_METRICS_ALLOWED_IPS]
+
+
+def is_metrics_request_allowed(request):
+    token = settings.DDAM_METRICS_TOKEN
+    if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks())
+
+
+def render_metrics():
+    """
+    The metrics of all processes as `(body, content type)`.
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
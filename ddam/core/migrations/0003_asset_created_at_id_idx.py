@@ -0,0 +1,17 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_delete_usagerestriction_remove_license_slug'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['-created_at', '-id'], name='asset_created_at_id_idx'),
+        ),
+    ]
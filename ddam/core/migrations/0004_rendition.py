@@ -0,0 +1,32 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_asset_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('path', models.CharField(help_text='Path relative to MEDIA_ROOT.', max_length=255)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('format', models.CharField(max_length=10)),
+                ('filesize', models.PositiveBigIntegerField(help_text='Bytes')),
+                ('source_checksum', models.CharField(help_text='SHA-256 of the asset file this rendition was generated from.', max_length=64)),
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rendition', to='core.asset')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
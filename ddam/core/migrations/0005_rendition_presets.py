@@ -0,0 +1,38 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def delete_single_renditions(apps, schema_editor):
+    """
+    Single size renditions predate the presets. Drop their records, the
+    preset sets get generated by the tasks worker instead.
+    """
+    Rendition = apps.get_model('core', 'Rendition')
+    Rendition.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rendition'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_single_renditions, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='rendition',
+            name='preset',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='rendition',
+            name='asset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='core.asset'),
+        ),
+        migrations.AddConstraint(
+            model_name='rendition',
+            constraint=models.UniqueConstraint(fields=('asset', 'preset', 'format'), name='rendition_asset_preset_format_unique_constraint'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_rendition_presets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rendition',
+            name='source_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='rendition',
+            name='source_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:31
+
+import hashlib
+
+import ddam.core.models
+import ddam.core.validators
+from django.db import migrations, models
+
+
+def set_asset_checksums(apps, schema_editor):
+    """
+    Checksum already stored files, so new uploads get deduplicated against
+    them. The files themselves stay where they are.
+    """
+    Asset = apps.get_model('core', 'Asset')
+
+    for asset in Asset.objects.filter(checksum="").only("id", "file").iterator():
+        checksum = hashlib.sha256()
+        try:
+            with asset.file.open('rb') as f:
+                for chunk in f.chunks():
+                    checksum.update(chunk)
+        except (FileNotFoundError, ValueError):
+            continue
+        Asset.objects.filter(pk=asset.pk).update(checksum=checksum.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_rendition_source_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='checksum',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='SHA-256 of the file. Set automatically while uploading.', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='file',
+            field=models.FileField(upload_to=ddam.core.models.asset_upload_to, validators=[ddam.core.validators.validate_fileextension, ddam.core.validators.validate_filetype, ddam.core.validators.validate_filesize]),
+        ),
+        migrations.AlterField(
+            model_name='rendition',
+            name='path',
+            field=models.CharField(db_index=True, help_text='Path relative to MEDIA_ROOT.', max_length=255),
+        ),
+        migrations.RunPython(set_asset_checksums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:35
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_asset_checksum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.EmailField(blank=True, editable=False, max_length=254)),
+                ('updated_by', models.EmailField(blank=True, editable=False, max_length=254)),
+                ('filename', models.CharField(max_length=255)),
+                ('title', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Total size in bytes, announced by the client.')),
+                ('chunk_size', models.PositiveIntegerField(help_text='Size of all but the last chunk in bytes.')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Bytes received so far.')),
+                ('asset', models.ForeignKey(blank=True, help_text='The asset created from the completed upload.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.asset')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
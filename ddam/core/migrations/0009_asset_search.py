@@ -0,0 +1,115 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copies of the table definitions and documents of ddam/core/search.py
+# at the time of this migration: later changes to the live module must not
+# change what this migration does.
+
+SEARCH_TABLE = "core_assetsearch"
+
+SQLITE_CREATE_SQL = f"""
+CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+    asset_id UNINDEXED,
+    title, filename, related, description, copyright,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+POSTGRESQL_CREATE_SQL = [
+    f"""
+    CREATE TABLE {SEARCH_TABLE} (
+        asset_id uuid PRIMARY KEY
+            REFERENCES core_asset (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )
+    """,
+    f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)",
+]
+
+POSTGRESQL_DOCUMENT_SQL = " || ".join(
+    f"setweight(to_tsvector('simple', %s), '{label}')" for label in "ABCDD"
+)
+
+
+def _document(asset):
+    related = [usage.title for usage in asset.usage.all()]
+    if asset.license:
+        related.append(asset.license.title)
+    if asset.dealer:
+        related.append(asset.dealer.title)
+    return [
+        asset.title,
+        asset.filename_orig,
+        " ".join(related),
+        asset.description,
+        asset.copyright_statement,
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ("sqlite", "postgresql"):
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(SQLITE_CREATE_SQL)
+        else:
+            for sql in POSTGRESQL_CREATE_SQL:
+                cursor.execute(sql)
+
+        Asset = apps.get_model('core', 'Asset')
+        assets = (
+            Asset
+            .objects
+            .using(connection.alias)
+            .select_related("license", "dealer")
+            .prefetch_related("usage")
+        )
+        pk_field = Asset._meta.pk
+        for asset in assets.iterator(chunk_size=500):
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    f"INSERT INTO {SEARCH_TABLE} "
+                    f"(rowid, asset_id, title, filename, related, description, copyright) "
+                    f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    # The rowid is derived from the UUID, see search._rowid
+                    [asset.pk.int >> 65, pk_field.get_db_prep_value(asset.pk, connection), *_document(asset)],
+                )
+            else:
+                cursor.execute(
+                    f"INSERT INTO {SEARCH_TABLE} (asset_id, document) VALUES (%s, {POSTGRESQL_DOCUMENT_SQL})",
+                    [asset.pk, *_document(asset)],
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor in ("sqlite", "postgresql"):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetSearch',
+            fields=[
+                ('asset', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='core.asset')),
+            ],
+            options={
+                'db_table': 'core_assetsearch',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
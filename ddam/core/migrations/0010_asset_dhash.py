@@ -0,0 +1,38 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_asset_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='dhash',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Perceptual hash of the image, to find near-duplicates. Set automatically while uploading.', null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='dhash_0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='dhash_1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='dhash_2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='dhash_3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
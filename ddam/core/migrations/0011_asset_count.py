@@ -0,0 +1,46 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def set_asset_counts(apps, schema_editor):
+    Asset = apps.get_model('core', 'Asset')
+
+    for model_name in ('usage', 'license', 'dealer'):
+        Model = apps.get_model('core', model_name)
+        counts = (
+            Asset
+            .objects
+            .filter(**{f'{model_name}__isnull': False})
+            .values_list(model_name)
+            .annotate(count=Count('pk'))
+        )
+        for pk, count in counts:
+            Model.objects.filter(pk=pk).update(asset_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_asset_dhash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dealer',
+            name='asset_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of related assets. Kept up to date automatically.'),
+        ),
+        migrations.AddField(
+            model_name='license',
+            name='asset_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of related assets. Kept up to date automatically.'),
+        ),
+        migrations.AddField(
+            model_name='usage',
+            name='asset_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of related assets. Kept up to date automatically.'),
+        ),
+        migrations.RunPython(set_asset_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:54
+
+import ddam.core.models
+import ddam.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_asset_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asset',
+            name='file',
+            field=models.FileField(upload_to=ddam.core.models.asset_upload_to, validators=[ddam.core.validators.validate_asset_file]),
+        ),
+    ]
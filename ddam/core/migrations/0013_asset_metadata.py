@@ -0,0 +1,68 @@
+# Generated by Django 6.0.5 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_asset_file_probe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='camera',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='captured_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Date taken'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='color_mode',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='creator',
+            field=models.CharField(blank=True, editable=False, help_text='Creator as embedded in the file (EXIF, IPTC or XMP).', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='embedded_copyright',
+            field=models.CharField(blank=True, editable=False, help_text='Copyright as embedded in the file (EXIF, IPTC or XMP).', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='file_size',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, help_text='Size of the file in bytes.'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='image_format',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Further embedded metadata, e.g. exposure settings.'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='orientation',
+            field=models.CharField(blank=True, choices=[('landscape', 'Landscape'), ('portrait', 'Portrait'), ('square', 'Square')], db_index=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.5 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_asset_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.EmailField(blank=True, editable=False, max_length=254)),
+                ('updated_by', models.EmailField(blank=True, editable=False, max_length=254)),
+                ('url_name', models.CharField(blank=True, db_index=True, max_length=255, verbose_name='URL name')),
+                ('path', models.CharField(max_length=2000)),
+                ('method', models.CharField(max_length=10)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duration', models.FloatField(help_text='Seconds')),
+                ('format', models.CharField(choices=[('collapsed', 'Collapsed stacks (flame graph)'), ('pstats', 'cProfile (pstats)')], max_length=10)),
+                ('samples', models.PositiveIntegerField(blank=True, help_text='Number of stack samples taken, for collapsed stacks.', null=True)),
+                ('sampled', models.BooleanField(default=False, help_text='Picked by DDAM_PROFILE_SAMPLE_RATE, not requested by staff.')),
+                ('filename', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.5 on 2026-10-18 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_request_profile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rendition',
+            name='path',
+            field=models.CharField(db_index=True, help_text='Name in the media storage.', max_length=255),
+        ),
+    ]
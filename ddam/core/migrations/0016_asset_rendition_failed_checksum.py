@@ -0,0 +1,18 @@
+# Generated by Django 6.0.5 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_rendition_path_help_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='rendition_failed_checksum',
+            field=models.CharField(blank=True, editable=False, help_text='Checksum of the file generating renditions failed for. Not retried until the file changes.', max_length=64),
+        ),
+    ]
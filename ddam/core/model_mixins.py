@@ -1,11 +1,47 @@
 import uuid
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 
 class AbstractRelatedObjectMixin(models.Model):
+    asset_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of related assets. Kept up to date automatically.",
+    )
+
+    @classmethod
+    def update_asset_counts(cls, ids=None):
+        """
+        Recount the related assets of the objects with the given ids, or of
+        all objects. Counts are recomputed instead of incremented, so they
+        can not drift.
+        """
+        relation = cls._meta.get_field("asset")
+        relation_name = relation.field.name
+        counts = (
+            relation
+            .related_model
+            .objects
+            .filter(**{relation_name: OuterRef("pk")})
+            .order_by()
+            .values(relation_name)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+
+        queryset = cls.objects.all()
+        if ids is not None:
+            ids = {pk for pk in ids if pk is not None}
+            if not ids:
+                return 0
+            queryset = queryset.filter(pk__in=ids)
+
+        return queryset.update(asset_count=Coalesce(Subquery(counts), 0))
 
     @classmethod
     def get_app_label_and_model_name(cls):
@@ -1,14 +1,28 @@
+from pathlib import Path
+
 from django.conf import settings
-from django.db import models
-from django.db.models import Count
+from django.db import models, transaction
 from django.db.models.functions import Lower
+from django.core.files.storage import default_storage
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 # from django.utils.text import slugify
 
-from .image_helpers import get_rendition
-from .validators import validate_fileextension, validate_filetype, validate_filesize
+from .catalogue import bump_catalogue_version
+from .image_helpers import (
+    RENDITION_FORMATS,
+    RenditionInfo,
+    create_renditions,
+    get_filelike_checksum,
+    get_image_dhash,
+    plan_renditions,
+)
+from .instrumentation import timer
+from .metadata import EMPTY_METADATA, get_image_metadata
+from .similarity import hash_segments, rank_similar, similar_hashes_filter, to_signed
+from .validators import validate_asset_file
 
 
 from .model_mixins import (
@@ -119,7 +133,110 @@ class Dealer(AbstractRelatedObjectMixin, AbstractUuidModel, AbstractTimestampedM
 #         return f"{self.title}"
 
 
+# Fields written to the search index, see `search._document`
+SEARCH_INDEXED_FIELDS = {
+    "title", "filename_orig", "description", "copyright_statement",
+    "embedded_copyright", "creator", "license", "license_id", "dealer", "dealer_id",
+}
+
+
+class AssetQuerySet(models.QuerySet):
+    """
+    Keeps the `asset_count` of licenses and dealers, the catalogue version
+    and the search index up to date for bulk updates, which send no
+    signals. Single saves and usage changes are handled in `counters.py`,
+    `catalogue.py` and `search.py`, callers of `bulk_create` index the new
+    assets themselves.
+    """
+
+    def _reindex(self, asset_ids):
+        # The search module imports the models
+        from .search import index_assets
+
+        asset_ids = list(asset_ids)
+        transaction.on_commit(lambda: index_assets(asset_ids))
+
+    def _counted_ids(self, objs=None):
+        rows = (
+            [(obj.license_id, obj.dealer_id) for obj in objs]
+            if objs is not None
+            else self.values_list("license_id", "dealer_id")
+        )
+        license_ids, dealer_ids = set(), set()
+        for license_id, dealer_id in rows:
+            license_ids.add(license_id)
+            dealer_ids.add(dealer_id)
+        return license_ids, dealer_ids
+
+    def _update_counts(self, license_ids, dealer_ids):
+        License.update_asset_counts(license_ids)
+        Dealer.update_asset_counts(dealer_ids)
+        bump_catalogue_version()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._update_counts(*self._counted_ids(objs))
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if SEARCH_INDEXED_FIELDS & set(fields):
+            self._reindex(obj.pk for obj in objs)
+        counted = {"license", "license_id", "dealer", "dealer_id"} & set(fields)
+        if not counted:
+            bump_catalogue_version()
+            return super().bulk_update(objs, fields, *args, **kwargs)
+
+        old_ids = self.filter(pk__in=[obj.pk for obj in objs])._counted_ids()
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        new_ids = self._counted_ids(objs)
+        self._update_counts(old_ids[0] | new_ids[0], old_ids[1] | new_ids[1])
+        return rows
+
+    def update(self, **kwargs):
+        if SEARCH_INDEXED_FIELDS & kwargs.keys():
+            # Before updating, the update may change what the queryset matches
+            self._reindex(self.values_list("pk", flat=True))
+        counted = {"license", "license_id", "dealer", "dealer_id"} & kwargs.keys()
+        if not counted:
+            bump_catalogue_version()
+            return super().update(**kwargs)
+
+        license_ids, dealer_ids = self._counted_ids()
+        rows = super().update(**kwargs)
+        for name in counted:
+            value = kwargs[name]
+            pk = getattr(value, "pk", value)
+            (license_ids if name.startswith("license") else dealer_ids).add(pk)
+        self._update_counts(license_ids, dealer_ids)
+        return rows
+
+
+def asset_upload_to(instance, filename):
+    """
+    Content addressed upload path: `<upload dir>/ab/abcdef….jpg`, keyed on
+    the SHA-256 of the file, see `Asset.prepare_file`.
+    """
+    extension = Path(filename).suffix.lower()
+    checksum = instance.checksum
+    return f"{settings.DDAM_ASSET_UPLOAD_DIR}/{checksum[:2]}/{checksum}{extension}"
+
+
+def get_orientation(width, height):
+    if not width or not height:
+        return ""
+    if width == height:
+        return Asset.Orientation.SQUARE
+    return Asset.Orientation.LANDSCAPE if width > height else Asset.Orientation.PORTRAIT
+
+
 class Asset(AbstractTimestampedModel, AbstractUserTrackedModel, AbstractUuidModel, models.Model):
+
+    class Orientation(models.TextChoices):
+        LANDSCAPE = 'landscape', _('Landscape')
+        PORTRAIT = 'portrait', _('Portrait')
+        SQUARE = 'square', _('Square')
+
     title = models.CharField(
         max_length=255,
         blank=False,
@@ -127,12 +244,8 @@ class Asset(AbstractTimestampedModel, AbstractUserTrackedModel, AbstractUuidMode
     )
     file = models.FileField(
         blank=False,
-        upload_to=settings.DDAM_ASSET_UPLOAD_DIR,
-        validators=[
-            validate_fileextension,
-            validate_filetype,
-            validate_filesize,
-        ],
+        upload_to=asset_upload_to,
+        validators=[validate_asset_file],
     )
     filename_orig = models.CharField(
         max_length=255,
@@ -140,6 +253,75 @@ class Asset(AbstractTimestampedModel, AbstractUserTrackedModel, AbstractUuidMode
         editable=False,
         help_text="Original filename. Set automatically while creating an asset."
     )
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="SHA-256 of the file. Set automatically while uploading."
+    )
+    dhash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Perceptual hash of the image, to find near-duplicates. Set automatically while uploading."
+    )
+    rendition_failed_checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Checksum of the file generating renditions failed for. Not retried until the file changes."
+    )
+    # 16 bit segments of `dhash`, indexed for the lookup in `similarity.py`
+    dhash_0 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    dhash_1 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    dhash_2 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    dhash_3 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    # Technical metadata of the file, set automatically while uploading,
+    # see `metadata.py`
+    file_size = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        help_text="Size of the file in bytes.",
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    orientation = models.CharField(
+        max_length=10,
+        blank=True,
+        editable=False,
+        db_index=True,
+        choices=Orientation.choices,
+    )
+    image_format = models.CharField(max_length=10, blank=True, editable=False)
+    color_mode = models.CharField(max_length=10, blank=True, editable=False)
+    captured_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Date taken",
+    )
+    camera = models.CharField(max_length=255, blank=True, editable=False)
+    creator = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Creator as embedded in the file (EXIF, IPTC or XMP).",
+    )
+    embedded_copyright = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Copyright as embedded in the file (EXIF, IPTC or XMP).",
+    )
+    metadata = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Further embedded metadata, e.g. exposure settings.",
+    )
     description = models.TextField(
         blank=True
     )
@@ -176,28 +358,535 @@ class Asset(AbstractTimestampedModel, AbstractUserTrackedModel, AbstractUuidMode
         help_text="In which context this asset is in use."
     )
 
+    objects = AssetQuerySet.as_manager()
+
     @property
     def get_usage_with_count(self):
-        usage_ids = self.usage.all().values_list("id", flat=True)
+        return self.usage.order_by("-asset_count")
+
+    @cached_property
+    def get_image_renditions(self):
+        """
+        The stored renditions of this asset as `RenditionSet` or `None` while
+        they are not generated yet, see `tasks.generate_renditions`. Prefetch
+        the `renditions` relation in list querysets, then rendering does not
+        touch the filesystem.
+        """
+        renditions = self.renditions.all()
+        return RenditionSet(renditions) if renditions else None
 
-        all_usage_queryset = (
-            Usage
+    @property
+    def renditions_failed(self):
+        """
+        Whether generating renditions of the current file failed, see
+        `tasks.generate_renditions`.
+        """
+        return bool(self.rendition_failed_checksum) and self.rendition_failed_checksum == self.checksum
+
+    def set_dhash(self, value):
+        """
+        Set the perceptual hash, a 64 bit integer, signed or not, or `None`,
+        along with its indexed segments.
+        """
+        if value is None:
+            self.dhash = self.dhash_0 = self.dhash_1 = self.dhash_2 = self.dhash_3 = None
+            return
+
+        self.dhash = to_signed(value)
+        self.dhash_0, self.dhash_1, self.dhash_2, self.dhash_3 = hash_segments(value)
+
+    def set_metadata(self, metadata, file_size):
+        """
+        Set the technical metadata columns from an `ImageMetadata`, or clear
+        them for `None`.
+        """
+        metadata = metadata or EMPTY_METADATA
+        self.file_size = file_size
+        self.width = metadata.width
+        self.height = metadata.height
+        self.orientation = get_orientation(metadata.width, metadata.height)
+        self.image_format = metadata.format
+        self.color_mode = metadata.color_mode
+        self.captured_at = metadata.captured_at
+        self.camera = metadata.camera
+        self.creator = metadata.creator
+        self.embedded_copyright = metadata.copyright
+        self.metadata = metadata.details
+
+    def find_similar(self, max_distance=None, limit=None):
+        """
+        Other assets with a perceptual hash within `max_distance` bits, the
+        most similar first, each with its `dhash_distance` set.
+        """
+        if self.dhash is None:
+            return []
+
+        max_distance = settings.DDAM_SIMILAR_MAX_DISTANCE if max_distance is None else max_distance
+        candidates = (
+            Asset
             .objects
-            .annotate(
-                count=Count('asset'),
-            )
-            .order_by("-count")
+            .filter(similar_hashes_filter([self.dhash], max_distance))
+            .exclude(pk=self.pk)
+            .select_related("license")
+            .prefetch_related("renditions")
         )
+        return rank_similar(self.dhash, candidates, max_distance)[:limit]
+
+    @cached_property
+    def get_similar_assets(self):
+        return self.find_similar(limit=settings.DDAM_SIMILAR_ASSETS_LIMIT)
+
+    def prepare_file(self):
+        """
+        Checksum, hash and read the metadata of a new upload, reusing what
+        validating it found out, and link it to an already stored identical
+        file instead of storing it again. Returns the asset already using
+        this file, if any. Call before saving, `save()` does it as well.
+        """
+        if not self.file or self.file._committed:
+            return None
+
+        self.checksum = get_filelike_checksum(self.file)
+
+        duplicate = (
+            Asset
+            .objects
+            .filter(checksum=self.checksum)
+            .exclude(pk=self.pk)
+            .first()
+        )
+        probe = getattr(self.file, "probe", None)
+        if duplicate and duplicate.dhash is not None:
+            self.set_dhash(duplicate.dhash)
+        elif probe is not None:
+            self.set_dhash(probe.dhash)
+        else:
+            self.set_dhash(get_image_dhash(self.file))
+
+        if probe is not None:
+            self.set_metadata(probe.metadata, probe.size)
+        else:
+            self.set_metadata(get_image_metadata(self.file), self.file.size)
+
+        if duplicate:
+            blob_name = duplicate.file.name
+        else:
+            blob_name = self.file.field.generate_filename(self, self.file.name)
+            if not self.file.storage.exists(blob_name):
+                return None
+
+        self.file.name = blob_name
+        self.file._committed = True
+        return duplicate
+
+    def save(self, *args, **kwargs):
+        self.prepare_file()
+
+        file_changed = False
+        if not self._state.adding:
+            stored_file = (
+                Asset
+                .objects
+                .filter(pk=self.pk)
+                .values_list("file", flat=True)
+                .first()
+            )
+            file_changed = stored_file != self.file.name
 
-        usage_qs = all_usage_queryset.filter(id__in=usage_ids)
-        return usage_qs
+        super().save(*args, **kwargs)
 
-    @property
-    def get_image_rendition(self):        
-        return get_rendition(self.file)
+        if file_changed:
+            # The stored renditions belong to the replaced file
+            for rendition in Rendition.objects.filter(asset=self):
+                rendition.purge()
+            getattr(self, "_prefetched_objects_cache", {}).pop("renditions", None)
+            self.__dict__.pop("get_image_renditions", None)
 
     def get_absolute_url(self):
         return reverse('core:asset-detail', kwargs={'id': self.id})
 
     def __str__(self):
         return f"{self.title}"
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the asset list, see `pagination.py`
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="asset_created_at_id_idx",
+            ),
+        ]
+
+
+class AssetSearch(models.Model):
+    """
+    The full-text search index of an asset, see `search.py`. The table is
+    created by a migration for the database in use, so it is not managed by
+    Django. Only the key column is mapped, to join it.
+    """
+    asset = models.OneToOneField(
+        Asset,
+        primary_key=True,
+        on_delete=models.DO_NOTHING,
+        related_name="search_index",
+        db_constraint=False,
+    )
+
+    class Meta:
+        managed = False
+        db_table = "core_assetsearch"
+
+
+class ChunkedUpload(AbstractUuidModel, AbstractTimestampedModel, AbstractUserTrackedModel):
+    """
+    A resumable upload in progress, see `uploads.append_chunk`. The received
+    bytes are assembled on disk in `part_path` until the upload is complete
+    and turned into an `Asset`.
+    """
+    filename = models.CharField(
+        max_length=255,
+    )
+    title = models.CharField(
+        max_length=255,
+    )
+    size = models.PositiveBigIntegerField(
+        help_text="Total size in bytes, announced by the client.",
+    )
+    chunk_size = models.PositiveIntegerField(
+        help_text="Size of all but the last chunk in bytes.",
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Bytes received so far.",
+    )
+    asset = models.ForeignKey(
+        Asset,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text="The asset created from the completed upload.",
+    )
+
+    @property
+    def part_path(self):
+        return settings.DDAM_CHUNKED_UPLOAD_ROOT / f"{self.id}.part"
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+    def delete(self, *args, **kwargs):
+        self.part_path.unlink(missing_ok=True)
+        return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class RequestProfile(AbstractTimestampedModel, AbstractUserTrackedModel):
+    """
+    A profiled request, see `profiling.ProfilerMiddleware`. The profile
+    itself is a file in `DDAM_PROFILE_ROOT`.
+    """
+
+    class Format(models.TextChoices):
+        COLLAPSED = 'collapsed', _('Collapsed stacks (flame graph)')
+        PSTATS = 'pstats', _('cProfile (pstats)')
+
+    url_name = models.CharField(
+        max_length=255,
+        blank=True,
+        db_index=True,
+        verbose_name="URL name",
+    )
+    path = models.CharField(
+        max_length=2000,
+    )
+    method = models.CharField(
+        max_length=10,
+    )
+    status = models.PositiveSmallIntegerField()
+    duration = models.FloatField(
+        help_text="Seconds",
+    )
+    format = models.CharField(
+        max_length=10,
+        choices=Format.choices,
+    )
+    samples = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Number of stack samples taken, for collapsed stacks.",
+    )
+    sampled = models.BooleanField(
+        default=False,
+        help_text="Picked by DDAM_PROFILE_SAMPLE_RATE, not requested by staff.",
+    )
+    filename = models.CharField(
+        max_length=255,
+    )
+
+    @property
+    def file_path(self):
+        return settings.DDAM_PROFILE_ROOT / self.filename
+
+    @classmethod
+    def prune(cls, keep=None):
+        """
+        Delete all but the `keep` latest profiles, `DDAM_PROFILE_KEEP` by
+        default.
+        """
+        keep = settings.DDAM_PROFILE_KEEP if keep is None else keep
+        for profile in cls.objects.order_by("-created_at")[keep:]:
+            profile.delete()
+
+    def delete(self, *args, **kwargs):
+        self.file_path.unlink(missing_ok=True)
+        return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration * 1000:.0f}ms)"
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
+class Rendition(AbstractTimestampedModel, models.Model):
+    """
+    Metadata of a generated image rendition of an asset, stored to not
+    have to stat and open rendition files while rendering pages. Each asset
+    has one rendition per preset and format, see `DDAM_RENDITION_PRESETS`.
+    """
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name="renditions",
+    )
+    preset = models.CharField(
+        max_length=20,
+        blank=True,
+    )
+    path = models.CharField(
+        max_length=255,
+        db_index=True,
+        help_text="Name in the media storage.",
+    )
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+    )
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+    )
+    format = models.CharField(
+        max_length=10,
+    )
+    filesize = models.PositiveBigIntegerField(
+        help_text="Bytes",
+    )
+    source_checksum = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the asset file this rendition was generated from.",
+    )
+    source_width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+    )
+    source_height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+    )
+
+    @classmethod
+    def create_for_asset(cls, asset):
+        """
+        (Re-)generate all renditions of `asset`, replacing stored ones.
+        """
+        with asset.file.open("rb") as source:
+            source_checksum = get_filelike_checksum(source)
+
+            renditions = cls.copy_from_duplicate(asset, source_checksum)
+            if renditions:
+                return renditions
+
+            with timer("rendition"):
+                rendition_infos = create_renditions(source, source_checksum, asset.file.storage)
+        if not rendition_infos:
+            return None
+
+        return cls.store_for_asset(asset, rendition_infos, source_checksum)
+
+    @classmethod
+    def copy_from_duplicate(cls, asset, source_checksum):
+        """
+        Renditions are content addressed, so assets sharing a file share
+        the rendition files as well. Reuse the current renditions of another
+        asset with the same source instead of generating them again.
+        """
+        duplicate_asset_id = (
+            cls
+            .objects
+            .filter(source_checksum=source_checksum)
+            .exclude(asset=asset)
+            .values_list("asset_id", flat=True)
+            .first()
+        )
+        if duplicate_asset_id is None:
+            return None
+
+        duplicate_renditions = RenditionSet(cls.objects.filter(asset_id=duplicate_asset_id))
+        if duplicate_renditions.is_stale:
+            return None
+
+        rendition_infos = [
+            RenditionInfo(**{
+                field: getattr(rendition, field)
+                for field in RenditionInfo._fields
+            })
+            for rendition in duplicate_renditions.renditions
+        ]
+        return cls.store_for_asset(asset, rendition_infos, source_checksum)
+
+    @classmethod
+    def store_for_asset(cls, asset, rendition_infos, source_checksum):
+        """
+        Replace the stored renditions of `asset` with the already generated
+        `rendition_infos`. Rendition files no longer part of the new set
+        get deleted.
+        """
+        new_paths = {rendition_info.path for rendition_info in rendition_infos}
+
+        with transaction.atomic():
+            for rendition in cls.objects.filter(asset=asset):
+                if rendition.path in new_paths:
+                    rendition.delete()
+                else:
+                    rendition.purge()
+
+            renditions = cls.objects.bulk_create([
+                cls(
+                    asset=asset,
+                    source_checksum=source_checksum,
+                    **rendition_info._asdict(),
+                )
+                for rendition_info in rendition_infos
+            ])
+            bump_catalogue_version()
+
+            if asset.rendition_failed_checksum:
+                Asset.objects.filter(pk=asset.pk).update(rendition_failed_checksum="")
+                asset.rendition_failed_checksum = ""
+
+        return RenditionSet(renditions)
+
+    @property
+    def url(self):
+        return default_storage.url(self.path)
+
+    def purge(self):
+        """
+        Delete this record and the rendition file, unless other assets with
+        the same source still use it. SVG renditions point to the asset file
+        itself, which we must not delete. The file gets deleted once the
+        transaction commits, a rollback keeps it.
+        """
+        self.delete()
+        if self.format == "SVG":
+            return
+
+        path = self.path
+
+        def delete_file():
+            if not Rendition.objects.filter(path=path).exists():
+                default_storage.delete(path)
+
+        transaction.on_commit(delete_file)
+
+    def __str__(self):
+        return f"{self.path}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["asset", "preset", "format"],
+                name="rendition_asset_preset_format_unique_constraint",
+            ),
+        ]
+
+
+class RenditionSet:
+    """
+    The renditions of one asset, grouped for `<picture>`/`srcset` markup.
+    """
+
+    def __init__(self, renditions):
+        self.renditions = sorted(renditions, key=lambda rendition: rendition.width or 0)
+
+    @cached_property
+    def fallback(self):
+        """
+        The `<img src>`: the default preset in the most compatible, i.e. the
+        last configured, format. Sources smaller than the default preset
+        only have smaller renditions, we take the largest of them.
+        """
+        fallback_format = settings.DDAM_RENDITION_FORMATS[-1]
+        candidates = [
+            rendition for rendition in self.renditions
+            if rendition.format in (fallback_format, "SVG")
+        ] or self.renditions
+
+        for rendition in candidates:
+            if rendition.preset == settings.DDAM_RENDITION_DEFAULT_PRESET:
+                return rendition
+        return candidates[-1]
+
+    @cached_property
+    def version(self):
+        """
+        Changes whenever renditions get (re)generated, e.g. to key caches
+        of rendered markup.
+        """
+        latest = max(rendition.updated_at for rendition in self.renditions)
+        return f"{len(self.renditions)}.{latest.timestamp():.6f}"
+
+    @cached_property
+    def is_stale(self):
+        """
+        Whether the stored renditions differ from what the current presets
+        and formats would generate. Checked without touching any file.
+        """
+        if any(rendition.format == "SVG" for rendition in self.renditions):
+            return False
+
+        source = self.renditions[0]
+        if source.source_width is None or source.source_height is None:
+            return True
+
+        expected = {
+            (preset, size, image_format)
+            for preset, size in plan_renditions((source.source_width, source.source_height))
+            for image_format in settings.DDAM_RENDITION_FORMATS
+        }
+        stored = {
+            (rendition.preset, (rendition.width, rendition.height), rendition.format)
+            for rendition in self.renditions
+        }
+        return expected != stored
+
+    @cached_property
+    def sources(self):
+        """
+        One `<source>` per bitmap format, preferred format first.
+        """
+        sources = []
+        for image_format in settings.DDAM_RENDITION_FORMATS:
+            srcset = ", ".join(
+                f"{rendition.url} {rendition.width}w"
+                for rendition in self.renditions
+                if rendition.format == image_format
+            )
+            if srcset:
+                _extension, mime_type = RENDITION_FORMATS[image_format]
+                sources.append({"type": mime_type, "srcset": srcset})
+        return sources
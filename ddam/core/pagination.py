@@ -0,0 +1,180 @@
+"""
+Keyset (aka cursor) pagination.
+
+OFFSET based pagination gets slower the deeper one pages, as the database
+has to walk and discard all preceding rows. Keyset pagination filters on
+the sort key of the last seen row instead, which is answered via an index
+on `(created_at, id)` at the same cost for every page.
+
+Cursors are opaque, url-safe strings carrying the paging direction and the
+sort key of the boundary row.
+"""
+
+import base64
+import binascii
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+KeysetPage = namedtuple(
+    "KeysetPage",
+    "object_list has_next has_previous next_cursor previous_cursor",
+)
+
+CURSOR_NEXT = "n"
+CURSOR_PREVIOUS = "p"
+
+DEFAULT_ORDERING = ("-created_at", "-id")
+
+
+def _field_name(order):
+    return order.lstrip("-")
+
+
+def _encode_value(value):
+    # Keep full precision, the boundary row must compare equal to itself
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return value.hex
+    return value
+
+
+def encode_cursor(obj, direction, ordering=DEFAULT_ORDERING):
+    values = [_encode_value(getattr(obj, _field_name(order))) for order in ordering]
+    raw = json.dumps([direction, values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, ordering=DEFAULT_ORDERING):
+    """
+    Return a `(direction, values)` tuple, `values` being the sort key of the
+    boundary row, or `None` for missing or malformed cursors. Tampered
+    cursors or cursors of another ordering just yield the first page.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, raw_values = json.loads(raw)
+        if len(raw_values) != len(ordering):
+            return None
+
+        values = []
+        for order, value in zip(ordering, raw_values):
+            try:
+                field = model._meta.get_field(_field_name(order))
+            except FieldDoesNotExist:
+                # An annotation, e.g. a search rank
+                values.append(value)
+            else:
+                values.append(field.to_python(value))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError):
+        return None
+
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or None in values:
+        return None
+
+    return direction, values
+
+
+def _after(ordering, values, reverse=False):
+    """
+    Rows sorting after the boundary row `values` in `ordering`, or before it
+    if `reverse`: `(a > x) OR (a = x AND b > y) OR …`
+    """
+    conditions = []
+    equal = {}
+    for order, value in zip(ordering, values):
+        name = _field_name(order)
+        descending = order.startswith("-")
+        lookup = "gt" if descending == reverse else "lt"
+        conditions.append(Q(**equal, **{f"{name}__{lookup}": value}))
+        equal[name] = value
+    return reduce(or_, conditions)
+
+
+def _reversed(ordering):
+    return [order[1:] if order.startswith("-") else f"-{order}" for order in ordering]
+
+
+def _page_queryset(queryset, decoded, page_size, ordering):
+    direction = decoded[0] if decoded else None
+    page_queryset = queryset
+
+    if direction == CURSOR_PREVIOUS:
+        _direction, values = decoded
+        page_queryset = (
+            page_queryset
+            .filter(_after(ordering, values, reverse=True))
+            .order_by(*_reversed(ordering))
+        )
+    else:
+        if direction == CURSOR_NEXT:
+            _direction, values = decoded
+            page_queryset = page_queryset.filter(_after(ordering, values))
+        page_queryset = page_queryset.order_by(*ordering)
+
+    # One row more than requested tells whether there is another page
+    return page_queryset[:page_size + 1]
+
+
+def _keyset_page(rows, decoded, page_size, ordering):
+    direction = decoded[0] if decoded else None
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if direction == CURSOR_PREVIOUS:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, direction == CURSOR_NEXT
+
+    return KeysetPage(
+        object_list=rows,
+        has_next=has_next,
+        has_previous=has_previous,
+        next_cursor=encode_cursor(rows[-1], CURSOR_NEXT, ordering) if has_next else None,
+        previous_cursor=encode_cursor(rows[0], CURSOR_PREVIOUS, ordering) if has_previous else None,
+    )
+
+
+def paginate_keyset(queryset, cursor=None, page_size=50, ordering=DEFAULT_ORDERING):
+    """
+    Return one page of `queryset`, ordered by `ordering`, which must end
+    in a unique field.
+
+    We fetch one row more than requested to find out whether there is
+    another page in the paging direction, so no COUNT query is needed.
+    """
+    decoded = decode_cursor(cursor, queryset.model, ordering)
+    rows = list(_page_queryset(queryset, decoded, page_size, ordering))
+
+    if not rows and decoded:
+        # Stale cursor, e.g. the boundary rows got deleted or the filters
+        # changed: start over instead of showing an empty page.
+        return paginate_keyset(queryset, page_size=page_size, ordering=ordering)
+
+    return _keyset_page(rows, decoded, page_size, ordering)
+
+
+async def apaginate_keyset(queryset, cursor=None, page_size=50, ordering=DEFAULT_ORDERING):
+    """
+    Async version of `paginate_keyset`.
+    """
+    decoded = decode_cursor(cursor, queryset.model, ordering)
+    rows = [row async for row in _page_queryset(queryset, decoded, page_size, ordering)]
+
+    if not rows and decoded:
+        return await apaginate_keyset(queryset, page_size=page_size, ordering=ordering)
+
+    return _keyset_page(rows, decoded, page_size, ordering)
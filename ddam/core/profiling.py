@@ -0,0 +1,239 @@
+"""
+Opt-in profiling of single requests, in production as well.
+
+Staff users profile a request by adding `?_profile` to its URL or sending
+the header `X-DDAM-Profile`. `DDAM_PROFILE_SAMPLE_RATE = N` additionally
+profiles one in N of all requests. Profiles are written to
+`DDAM_PROFILE_ROOT` and listed in the admin, by URL name.
+
+Two formats:
+
+* `collapsed` (default): a sampling profiler takes the stacks every
+  `DDAM_PROFILE_INTERVAL` seconds and writes them as collapsed stacks, one
+  `frame;frame;frame count` line each. Open them with speedscope.app,
+  flamegraph.pl or inferno. All busy threads get sampled, async views run
+  partly in an event loop thread. Under threaded or ASGI servers work of
+  concurrent requests of the same process shows up as well.
+* `pstats` (`?_profile=pstats`): a cProfile dump of the thread handling the
+  request, for `python -m pstats` or snakeviz. Under ASGI, work run in
+  threads via `sync_to_async` is missing in it.
+"""
+
+import cProfile
+import random
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .models import RequestProfile
+
+
+PROFILE_PARAMETER = "_profile"
+PROFILE_HEADER = "X-DDAM-Profile"
+
+# Shortened in frame labels
+_PATH_PREFIXES = [sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"]]
+
+# Innermost Python frames of threads waiting for work, they get skipped
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in [str(settings.BASE_DIR.parent), *_PATH_PREFIXES]:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip("/")
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    """
+    The stack of `frame` as `outermost;…;innermost`, `None` if idle.
+    """
+    if (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in _IDLE_FRAMES:
+        return None
+
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Samples the stacks of all busy threads in a background thread.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ddam-profiler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                if stack:
+                    self.stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class Profile:
+    """
+    One running profile, `start` and `stop` it around the request.
+    """
+
+    def __init__(self, profile_format, sampled):
+        self.format = profile_format
+        self.sampled = sampled
+        if profile_format == RequestProfile.Format.PSTATS:
+            self.profiler = cProfile.Profile()
+        else:
+            self.profiler = StackSampler(settings.DDAM_PROFILE_INTERVAL)
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.format == RequestProfile.Format.PSTATS:
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if self.format == RequestProfile.Format.PSTATS:
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.duration = time.perf_counter() - self.started
+
+    def save(self, request, response):
+        """
+        Write the profile file and store its `RequestProfile`.
+        """
+        extension = "prof" if self.format == RequestProfile.Format.PSTATS else "collapsed"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.{extension}"
+        settings.DDAM_PROFILE_ROOT.mkdir(parents=True, exist_ok=True)
+        path = settings.DDAM_PROFILE_ROOT / filename
+        if self.format == RequestProfile.Format.PSTATS:
+            self.profiler.dump_stats(path)
+        else:
+            self.profiler.write(path)
+
+        resolver_match = getattr(request, "resolver_match", None)
+        user = getattr(request, "user", None)
+        RequestProfile.objects.create(
+            url_name=resolver_match.view_name if resolver_match else "",
+            path=request.get_full_path()[:2000],
+            method=request.method,
+            status=response.status_code,
+            duration=self.duration,
+            format=self.format,
+            samples=getattr(self.profiler, "samples", None),
+            sampled=self.sampled,
+            filename=filename,
+            created_by=getattr(user, "email", "") or "",
+        )
+        RequestProfile.prune()
+
+
+def _requested_format(request):
+    value = request.GET.get(PROFILE_PARAMETER, request.headers.get(PROFILE_HEADER))
+    if value is None:
+        return None
+    return RequestProfile.Format.PSTATS if value == RequestProfile.Format.PSTATS else RequestProfile.Format.COLLAPSED
+
+
+def _is_sampled():
+    rate = settings.DDAM_PROFILE_SAMPLE_RATE
+    return rate > 0 and random.randrange(rate) == 0
+
+
+class ProfilerMiddleware:
+    """
+    Put it after `AuthenticationMiddleware`, it checks for staff users.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        profile_format = _requested_format(request)
+        if profile_format and not request.user.is_staff:
+            profile_format = None
+        sampled = profile_format is None and _is_sampled()
+        if not (profile_format or sampled):
+            return self.get_response(request)
+
+        profile = Profile(profile_format or RequestProfile.Format.COLLAPSED, sampled)
+        try:
+            profile.start()
+        except ValueError:
+            # Another cProfile is running in this thread, e.g. of a concurrent request
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        profile.save(request, response)
+        return response
+
+    async def __acall__(self, request):
+        profile_format = _requested_format(request)
+        if profile_format and not (await request.auser()).is_staff:
+            profile_format = None
+        sampled = profile_format is None and _is_sampled()
+        if not (profile_format or sampled):
+            return await self.get_response(request)
+
+        profile = Profile(profile_format or RequestProfile.Format.COLLAPSED, sampled)
+        try:
+            profile.start()
+        except ValueError:
+            # Another cProfile is running in this thread, e.g. of a concurrent request
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop()
+        await sync_to_async(profile.save)(request, response)
+        return response
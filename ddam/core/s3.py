@@ -0,0 +1,31 @@
+"""
+Media files in an S3 compatible object storage (AWS S3, MinIO, Ceph, …),
+enabled by setting `DDAM_S3_BUCKET`, see the settings.
+
+Pages keep linking to `/media/…`: the media view checks the login and
+redirects to a short-lived presigned URL of the object, see `media.py`.
+The bucket itself stays private.
+"""
+
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+from storages.backends.s3 import S3Storage
+
+
+class MediaS3Storage(S3Storage):
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        """
+        The URL of the media view for `name`, like `FileSystemStorage`.
+        """
+        return urljoin(settings.MEDIA_URL, filepath_to_uri(name))
+
+    def signed_url(self, name, parameters=None, expire=None):
+        """
+        Presigned URL to get `name` from the object storage directly.
+        `parameters` may override response headers, e.g.
+        `ResponseCacheControl`.
+        """
+        return super().url(name, parameters=parameters, expire=expire)
@@ -0,0 +1,264 @@
+"""
+Full-text search over assets.
+
+The index lives in its own table, `core_assetsearch`, created by migration
+0009 for the database in use: an FTS5 virtual table on SQLite, a weighted
+`tsvector` with a GIN index on PostgreSQL. Other databases fall back to
+`icontains` lookups.
+
+The index is kept in sync by the signal handlers below and, for bulk
+updates, by `AssetQuerySet`. Callers of `bulk_create` call `index_assets`
+themselves, and
+
+    ./manage.py rebuild_search_index
+
+rebuilds it from scratch.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import Expression
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.db.utils import NotSupportedError
+from django.dispatch import receiver
+
+from .models import Asset, Dealer, License, Usage
+
+
+SEARCH_TABLE = "core_assetsearch"
+SEARCH_VENDORS = ("sqlite", "postgresql")
+INDEX_BATCH_SIZE = 500
+
+# Indexed columns in order with their weights: title matters most,
+# free text least. PostgreSQL only knows four weights, A to D.
+SEARCH_COLUMNS = [
+    ("title", 10.0, "A"),
+    ("filename", 5.0, "B"),
+    ("related", 3.0, "C"),
+    ("description", 1.0, "D"),
+    ("copyright", 1.0, "D"),
+]
+
+
+def is_supported():
+    return connection.vendor in SEARCH_VENDORS
+
+
+def _rowid(asset_id):
+    """
+    FTS5 rows are addressed by an integer rowid: derive it from the asset's
+    UUID, so rows can be replaced without scanning the index.
+    """
+    return asset_id.int >> 65
+
+
+def _document(asset):
+    """
+    The indexed text of an asset, in the order of `SEARCH_COLUMNS`.
+    """
+    related = [str(usage) for usage in asset.usage.all()]
+    if asset.license:
+        related.append(str(asset.license))
+    if asset.dealer:
+        related.append(str(asset.dealer))
+
+    return [
+        asset.title,
+        asset.filename_orig,
+        " ".join(related),
+        asset.description,
+        " ".join(filter(None, [asset.copyright_statement, asset.embedded_copyright, asset.creator])),
+    ]
+
+
+def index_assets(asset_ids):
+    """
+    (Re)index the given assets. Ids of deleted assets drop them from the
+    index.
+    """
+    if not is_supported():
+        return
+
+    asset_ids = list(asset_ids)
+    pk_field = Asset._meta.pk
+    columns = ", ".join(name for name, _weight, _label in SEARCH_COLUMNS)
+
+    for start in range(0, len(asset_ids), INDEX_BATCH_SIZE):
+        batch = asset_ids[start:start + INDEX_BATCH_SIZE]
+        assets = (
+            Asset
+            .objects
+            .filter(pk__in=batch)
+            .select_related("license", "dealer")
+            .prefetch_related("usage")
+        )
+        placeholders = ", ".join(["%s"] * len(batch))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})",
+                    [_rowid(pk_field.to_python(pk)) for pk in batch],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, asset_id, {columns}) "
+                    f"VALUES (%s, %s, {', '.join(['%s'] * len(SEARCH_COLUMNS))})",
+                    [
+                        [_rowid(asset.pk), pk_field.get_db_prep_value(asset.pk, connection), *_document(asset)]
+                        for asset in assets
+                    ],
+                )
+            else:
+                cursor.execute(
+                    f"DELETE FROM {SEARCH_TABLE} WHERE asset_id IN ({placeholders})",
+                    batch,
+                )
+                document_sql = " || ".join(
+                    f"setweight(to_tsvector('simple', %s), '{label}')"
+                    for _name, _weight, label in SEARCH_COLUMNS
+                )
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (asset_id, document) VALUES (%s, {document_sql})",
+                    [[asset.pk, *_document(asset)] for asset in assets],
+                )
+
+
+def rebuild_search_index():
+    """
+    Drop and fill the whole index. Returns the number of indexed assets.
+    """
+    if not is_supported():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    asset_ids = list(Asset.objects.values_list("pk", flat=True))
+    index_assets(asset_ids)
+    return len(asset_ids)
+
+
+def _search_terms(value):
+    return re.findall(r"\w+", value)
+
+
+class _IndexExpression(Expression):
+    """
+    An expression on the search index row joined to an asset queryset.
+    """
+
+    def __init__(self, terms):
+        super().__init__()
+        self.index = F("search_index__asset")
+        self.terms = terms
+
+    def get_source_expressions(self):
+        return [self.index]
+
+    def set_source_expressions(self, exprs):
+        (self.index,) = exprs
+
+    def get_table(self, compiler):
+        return compiler.quote_name_unless_alias(self.index.alias)
+
+    def fts_query(self):
+        # Every term as a quoted prefix query, all of them have to match
+        return " ".join(f'"{term}"*' for term in self.terms)
+
+    def tsquery(self):
+        return " & ".join(f"{term}:*" for term in self.terms)
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError(f"Full-text search is not supported on {connection.vendor}.")
+
+
+class SearchMatch(_IndexExpression):
+    output_field = BooleanField()
+    conditional = True
+
+    def as_sqlite(self, compiler, connection):
+        table = self.get_table(compiler)
+        return f"{table}.{SEARCH_TABLE} MATCH %s", [self.fts_query()]
+
+    def as_postgresql(self, compiler, connection):
+        table = self.get_table(compiler)
+        return f"{table}.document @@ to_tsquery('simple', %s)", [self.tsquery()]
+
+
+class SearchRank(_IndexExpression):
+    """
+    Relevance of a match, lower is better on all databases.
+    """
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection):
+        table = self.get_table(compiler)
+        weights = ", ".join(str(weight) for _name, weight, _label in SEARCH_COLUMNS)
+        return f"bm25({table}.{SEARCH_TABLE}, 0.0, {weights})", []
+
+    def as_postgresql(self, compiler, connection):
+        table = self.get_table(compiler)
+        return f"-ts_rank({table}.document, to_tsquery('simple', %s))", [self.tsquery()]
+
+
+def search_assets(queryset, value):
+    """
+    Filter an asset queryset down to the assets matching all words of
+    `value`, as prefixes. The queryset gets annotated with `search_rank`,
+    order by it for the most relevant assets first.
+    """
+    terms = _search_terms(value)
+    if not terms:
+        return queryset
+
+    if not is_supported():
+        return queryset.filter(
+            Q(title__icontains=value) |
+            Q(description__icontains=value)
+        )
+
+    return (
+        queryset
+        .filter(search_index__isnull=False)
+        .filter(SearchMatch(terms))
+        .annotate(search_rank=SearchRank(terms))
+    )
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+def update_asset_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_assets([instance.pk])
+
+
+@receiver(m2m_changed, sender=Asset.usage.through)
+def update_asset_usage_index(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            index_assets([instance.pk])
+    elif action == "pre_clear":
+        instance._search_asset_ids = list(instance.asset_set.values_list("pk", flat=True))
+    elif action == "post_clear":
+        index_assets(getattr(instance, "_search_asset_ids", []))
+    elif action in ("post_add", "post_remove"):
+        index_assets(pk_set)
+
+
+@receiver(post_save, sender=Dealer)
+@receiver(post_save, sender=License)
+@receiver(post_save, sender=Usage)
+def update_related_index(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        index_assets(instance.asset_set.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Dealer)
+@receiver(pre_delete, sender=License)
+@receiver(pre_delete, sender=Usage)
+def update_deleted_related_index(sender, instance, **kwargs):
+    # Deleting clears the relation without sending signals for the assets
+    asset_ids = list(instance.asset_set.values_list("pk", flat=True))
+    transaction.on_commit(lambda: index_assets(asset_ids))
@@ -0,0 +1,99 @@
+"""
+Near-duplicate lookup on perceptual image hashes.
+
+Assets store a 64 bit dHash, see `image_helpers.get_image_dhash`. Similar
+images have hashes with a small Hamming distance. To find them without
+comparing against every asset, we use multi-index hashing: the hash is
+split into four 16 bit segments, each stored in its own indexed column.
+
+If two hashes differ in at most `d` bits, then by the pigeonhole principle
+at least one segment differs in at most `d // 4` bits. So we look up all
+segment values within that radius in the segment indexes and only compute
+the exact distance for those candidates.
+"""
+
+from functools import reduce
+from itertools import combinations
+from operator import or_
+
+from django.db.models import Q
+
+
+HASH_BITS = 64
+SEGMENT_BITS = 16
+SEGMENT_COUNT = HASH_BITS // SEGMENT_BITS
+
+_HASH_MASK = (1 << HASH_BITS) - 1
+_SEGMENT_MASK = (1 << SEGMENT_BITS) - 1
+
+
+def to_signed(value):
+    """
+    Unsigned hash to the signed 64 bit integer the database can store.
+    """
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value & _HASH_MASK
+
+
+def hash_segments(value):
+    """
+    The segments of a hash, most significant first.
+    """
+    value = to_unsigned(value)
+    return [
+        (value >> (SEGMENT_BITS * (SEGMENT_COUNT - 1 - index))) & _SEGMENT_MASK
+        for index in range(SEGMENT_COUNT)
+    ]
+
+
+def hamming_distance(a, b):
+    return ((a ^ b) & _HASH_MASK).bit_count()
+
+
+def segment_neighbours(value, radius):
+    """
+    All segment values differing from `value` in at most `radius` bits.
+    """
+    neighbours = {value}
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(SEGMENT_BITS), distance):
+            flipped = value
+            for bit in bits:
+                flipped ^= 1 << bit
+            neighbours.add(flipped)
+    return neighbours
+
+
+def similar_hashes_filter(hashes, max_distance):
+    """
+    A filter for assets possibly within `max_distance` of any of `hashes`,
+    answered from the segment indexes. Candidates still need checking with
+    `hamming_distance`.
+    """
+    radius = max_distance // SEGMENT_COUNT
+    lookups = [set() for _index in range(SEGMENT_COUNT)]
+    for value in hashes:
+        for index, segment in enumerate(hash_segments(value)):
+            lookups[index] |= segment_neighbours(segment, radius)
+
+    return reduce(or_, (
+        Q(**{f"dhash_{index}__in": sorted(values)})
+        for index, values in enumerate(lookups)
+    ))
+
+
+def rank_similar(value, candidates, max_distance):
+    """
+    Candidates within `max_distance` of the hash `value` as a list sorted by
+    distance. Each gets the distance set as `dhash_distance`.
+    """
+    similar = []
+    for candidate in candidates:
+        distance = hamming_distance(value, candidate.dhash)
+        if distance <= max_distance:
+            candidate.dhash_distance = distance
+            similar.append(candidate)
+    return sorted(similar, key=lambda candidate: candidate.dhash_distance)
@@ -0,0 +1,61 @@
+"""
+Access to stored media files, originals and renditions, only through
+Django's storage API: `default_storage` is the local `MEDIA_ROOT` or an S3
+compatible object storage, see `DDAM_S3_BUCKET` and `s3.py`.
+
+Stored files are content addressed, see `asset_upload_to` and
+`get_rendition_path`: a name that exists already holds the right content.
+"""
+
+from collections import defaultdict
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+
+def is_local_storage(storage=None):
+    """
+    Whether `storage`, `default_storage` by default, keeps its files in the
+    local filesystem, i.e. supports `path`.
+    """
+    storage = storage or default_storage
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return False
+    return True
+
+
+def open_stored_file(name, storage=None):
+    """
+    The file `name` of `storage`, `default_storage` by default, opened for
+    reading. Unlike with `storage.open`, the name of the returned `File` is
+    `name` with all backends.
+    """
+    storage = storage or default_storage
+    return File(storage.open(name, "rb"), name=name)
+
+
+def get_existing_names(storage, names):
+    """
+    The set of `names` already stored in `storage`. One `listdir` per
+    directory instead of one `exists` per name: the renditions of one
+    source share a directory, and with object storages each check is a
+    request.
+    """
+    filenames_by_directory = defaultdict(set)
+    for name in names:
+        directory, _separator, filename = name.rpartition("/")
+        filenames_by_directory[directory].add(filename)
+
+    existing = set()
+    for directory, filenames in filenames_by_directory.items():
+        try:
+            _directories, stored_filenames = storage.listdir(directory)
+        except FileNotFoundError:
+            continue
+        existing.update(
+            f"{directory}/{filename}" if directory else filename
+            for filename in filenames.intersection(stored_filenames)
+        )
+    return existing
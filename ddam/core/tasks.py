@@ -0,0 +1,81 @@
+"""
+Background tasks, run by the tasks worker:
+
+    ./manage.py db_worker
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.tasks import task
+
+from .instrumentation import record
+from .metrics import RENDITION_GENERATION_DURATION, RENDITION_GENERATIONS
+from .models import Asset, Rendition
+
+
+logger = logging.getLogger(__name__)
+
+
+RENDITION_QUEUED_CACHE_KEY = "ddam:rendition-queued:{asset_id}"
+RENDITION_QUEUED_TIMEOUT = 5 * 60  # Seconds
+
+
+@task
+def generate_renditions(asset_id):
+    asset = Asset.objects.filter(pk=asset_id).prefetch_related("renditions").first()
+    if asset is None:
+        # Deleted in the meantime
+        return None
+
+    renditions = asset.get_image_renditions
+    if renditions is None or renditions.is_stale:
+        started = time.perf_counter()
+        try:
+            renditions = Rendition.create_for_asset(asset)
+        except FileNotFoundError:
+            logger.warning("File of asset %s not found: %s", asset_id, asset.file.name)
+            renditions = None
+        duration = time.perf_counter() - started
+        RENDITION_GENERATIONS.labels("generated" if renditions else "failed").inc()
+        RENDITION_GENERATION_DURATION.observe(duration)
+        if renditions:
+            logger.info("Generated renditions of asset %s in %.0fms", asset_id, duration * 1000)
+        else:
+            # Not queued again until the file changes, see `queue_renditions`
+            logger.warning("Cannot generate renditions of asset %s", asset_id)
+            Asset.objects.filter(pk=asset.pk).update(rendition_failed_checksum=asset.checksum)
+
+    cache.delete(RENDITION_QUEUED_CACHE_KEY.format(asset_id=asset_id))
+    return len(renditions.renditions) if renditions else 0
+
+
+def queue_renditions(assets):
+    """
+    Enqueue rendition generation for the given assets once the current
+    transaction commits, so the worker never sees uncommitted assets.
+    Assets with current renditions, with an already queued task or whose
+    current file failed before are skipped.
+    """
+    hits = misses = 0
+    for asset in assets:
+        renditions = asset.get_image_renditions
+        if renditions is not None and not renditions.is_stale:
+            hits += 1
+            continue
+        if asset.renditions_failed:
+            continue
+
+        misses += 1
+        cache_key = RENDITION_QUEUED_CACHE_KEY.format(asset_id=asset.pk)
+        if not cache.add(cache_key, True, RENDITION_QUEUED_TIMEOUT):
+            continue
+
+        transaction.on_commit(
+            lambda asset_id=str(asset.pk): generate_renditions.enqueue(asset_id)
+        )
+
+    record("rendition_hit", hits)
+    record("rendition_miss", misses)
@@ -0,0 +1,124 @@
+from django.db.models import Count
+from django.test import TestCase, override_settings
+
+from ddam.core.models import Asset, Dealer, License, Usage
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class AssetCountTests(TestCase):
+
+    def setUp(self):
+        self.licenses = [License.objects.create(title=f"License {number}") for number in range(2)]
+        self.dealers = [Dealer.objects.create(title=f"Dealer {number}") for number in range(2)]
+        self.usages = [
+            Usage.objects.create(title=f"Usage {number}", media=Usage.MediaChoices.WEB)
+            for number in range(2)
+        ]
+        self.number = 0
+
+    def new_asset(self, **kwargs):
+        self.number += 1
+        return Asset(
+            title=f"Asset {self.number}",
+            filename_orig=f"{self.number}.jpg",
+            file=f"assets/{self.number}.jpg",
+            **kwargs,
+        )
+
+    def create_asset(self, usages=(), **kwargs):
+        asset = self.new_asset(**kwargs)
+        asset.save()
+        asset.usage.set(usages)
+        return asset
+
+    def assertCountsMatch(self):
+        for model in (License, Dealer, Usage):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    dict(model.objects.values_list("pk", "asset_count")),
+                    dict(model.objects.annotate(count=Count("asset")).values_list("pk", "count")),
+                )
+
+    def test_save(self):
+        self.create_asset(license=self.licenses[0], dealer=self.dealers[0])
+        self.assertEqual(License.objects.get(pk=self.licenses[0].pk).asset_count, 1)
+        self.assertCountsMatch()
+
+    def test_save_with_changed_relations(self):
+        asset = self.create_asset(license=self.licenses[0], dealer=self.dealers[0])
+        self.create_asset(license=self.licenses[0])
+
+        asset.license = self.licenses[1]
+        asset.dealer = None
+        asset.save()
+        self.assertCountsMatch()
+
+    def test_delete(self):
+        asset = self.create_asset(self.usages, license=self.licenses[0], dealer=self.dealers[0])
+        self.create_asset(self.usages[:1], license=self.licenses[0])
+
+        asset.delete()
+        self.assertCountsMatch()
+
+    def test_queryset_delete(self):
+        self.create_asset(self.usages, license=self.licenses[0])
+        self.create_asset(self.usages[:1], dealer=self.dealers[1])
+
+        Asset.objects.filter(license__isnull=False).delete()
+        self.assertCountsMatch()
+
+    def test_usage_add_remove_clear(self):
+        asset = self.create_asset()
+        other = self.create_asset(self.usages)
+
+        asset.usage.add(*self.usages)
+        self.assertEqual(Usage.objects.get(pk=self.usages[0].pk).asset_count, 2)
+        self.assertCountsMatch()
+
+        asset.usage.remove(self.usages[0])
+        self.assertCountsMatch()
+
+        asset.usage.clear()
+        self.assertCountsMatch()
+
+        # From the usage side
+        self.usages[0].asset_set.add(asset)
+        self.assertCountsMatch()
+        self.usages[0].asset_set.remove(other)
+        self.assertCountsMatch()
+        self.usages[1].asset_set.clear()
+        self.assertCountsMatch()
+
+    def test_bulk_create(self):
+        Asset.objects.bulk_create([
+            self.new_asset(license=self.licenses[0], dealer=self.dealers[0]),
+            self.new_asset(license=self.licenses[0]),
+            self.new_asset(dealer=self.dealers[1]),
+        ])
+        self.assertEqual(License.objects.get(pk=self.licenses[0].pk).asset_count, 2)
+        self.assertCountsMatch()
+
+    def test_bulk_update(self):
+        assets = [
+            self.create_asset(license=self.licenses[0], dealer=self.dealers[0]),
+            self.create_asset(license=self.licenses[0]),
+        ]
+        assets[0].license = self.licenses[1]
+        assets[1].license = None
+        assets[1].dealer = self.dealers[1]
+
+        Asset.objects.bulk_update(assets, ["license", "dealer"])
+        self.assertCountsMatch()
+
+    def test_update(self):
+        self.create_asset(license=self.licenses[0], dealer=self.dealers[0])
+        self.create_asset(license=self.licenses[1], dealer=self.dealers[0])
+
+        Asset.objects.filter(license=self.licenses[0]).update(license=self.licenses[1])
+        self.assertCountsMatch()
+
+        Asset.objects.update(dealer_id=self.dealers[1].pk)
+        self.assertCountsMatch()
+
+        Asset.objects.update(license=None)
+        self.assertCountsMatch()
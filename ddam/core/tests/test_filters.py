@@ -0,0 +1,88 @@
+from django.db.models import Count
+from django.test import TestCase, override_settings
+
+from ddam.core.filters import AssetFilter
+from ddam.core.models import Asset, Dealer, License, Usage
+from ddam.core.search import index_assets
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class FacetCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.licenses = [License.objects.create(title=f"License {number}") for number in range(3)]
+        cls.dealers = [Dealer.objects.create(title=f"Dealer {number}") for number in range(2)]
+        cls.usages = [
+            Usage.objects.create(title=f"Usage {number}", media=Usage.MediaChoices.WEB)
+            for number in range(3)
+        ]
+        assets = Asset.objects.bulk_create([
+            Asset(
+                title=f"{'Harbour' if number % 2 else 'Forest'} {number}",
+                filename_orig=f"{number}.jpg",
+                file=f"assets/{number}.jpg",
+                license=cls.licenses[number % 3] if number % 4 else None,
+                dealer=cls.dealers[number % 2] if number % 5 else None,
+                with_costs=number % 3 == 0,
+            )
+            for number in range(20)
+        ])
+        for number, asset in enumerate(assets):
+            asset.usage.set(cls.usages[:number % 4])
+        index_assets([asset.pk for asset in assets])
+
+    def expected_counts(self, querysets):
+        """
+        `facet_counts` computed one facet at a time, `querysets` being the
+        assets each facet counts.
+        """
+        expected = {}
+        for facet, queryset in querysets.items():
+            rows = queryset.order_by().values_list(facet).annotate(count=Count("pk", distinct=True))
+            expected[facet] = {value: count for value, count in rows if value is not None}
+        return expected
+
+    def assertFacetCounts(self, data, querysets):
+        asset_filter = AssetFilter(data, queryset=Asset.objects.all())
+        # Validating looks up the chosen objects
+        self.assertTrue(asset_filter.is_valid())
+        with self.assertNumQueries(1):
+            counts = asset_filter.facet_counts
+        self.assertEqual(counts, self.expected_counts(querysets))
+        return asset_filter
+
+    def test_without_filters(self):
+        assets = Asset.objects.all()
+        self.assertFacetCounts({}, dict.fromkeys(AssetFilter.FACETS, assets))
+
+    def test_active_filter(self):
+        license = self.licenses[1]
+        filtered = Asset.objects.filter(license=license)
+        asset_filter = self.assertFacetCounts({"license": str(license.pk)}, {
+            "usage": filtered,
+            # A facet does not filter its own counts
+            "license": Asset.objects.all(),
+            "dealer": filtered,
+            "with_costs": filtered,
+        })
+
+        asset_filter.label_facets()
+        usage = self.usages[0]
+        count = filtered.filter(usage=usage).count()
+        self.assertEqual(asset_filter.form.fields["usage"].label_from_instance(usage), f"{usage} ({count})")
+
+    def test_active_search(self):
+        found = Asset.objects.filter(title__startswith="Harbour")
+        self.assertFacetCounts({"title": "harbour"}, dict.fromkeys(AssetFilter.FACETS, found))
+
+    def test_active_search_and_filters(self):
+        dealer = self.dealers[1]
+        usage = self.usages[0]
+        found = Asset.objects.filter(title__startswith="Harbour")
+        self.assertFacetCounts({"title": "harbour", "dealer": str(dealer.pk), "usage": [str(usage.pk)]}, {
+            "usage": found.filter(dealer=dealer),
+            "license": found.filter(dealer=dealer, usage=usage),
+            "dealer": found.filter(usage=usage),
+            "with_costs": found.filter(dealer=dealer, usage=usage),
+        })
@@ -0,0 +1,41 @@
+import io
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.test import SimpleTestCase
+from PIL import Image
+
+from ddam.core.image_helpers import create_renditions
+
+
+def image_file(name, size=(300, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, "JPEG")
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+class CreateRenditionsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.storage = InMemoryStorage()
+
+    def test_renditions_get_saved(self):
+        renditions = create_renditions(image_file("teal.jpg"), "ab" * 32, self.storage)
+        self.assertTrue(renditions)
+        for rendition in renditions:
+            self.assertEqual(self.storage.size(rendition.path), rendition.filesize)
+
+    def test_corrupt_file(self):
+        with self.assertLogs("ddam.core.image_helpers", "WARNING"):
+            renditions = create_renditions(ContentFile(b"not an image", name="x.jpg"), "ab" * 32, self.storage)
+        self.assertEqual(renditions, [])
+
+    def test_decompression_bomb(self):
+        with (
+            mock.patch.object(Image, "MAX_IMAGE_PIXELS", 100),
+            self.assertLogs("ddam.core.image_helpers", "WARNING") as logs,
+        ):
+            renditions = create_renditions(image_file("bomb.jpg"), "ab" * 32, self.storage)
+        self.assertEqual(renditions, [])
+        self.assertIn("DecompressionBombError", logs.output[0])
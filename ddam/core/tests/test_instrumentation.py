@@ -0,0 +1,15 @@
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import SimpleTestCase
+
+from ddam.core.instrumentation import _record_query
+
+
+class QueryWrapperTests(SimpleTestCase):
+
+    def test_reconnecting_installs_the_wrapper_once(self):
+        # What every reconnect of the same connection object sends. The
+        # in-memory test database does not really close.
+        for _ in range(3):
+            connection_created.send(sender=connection.__class__, connection=connection)
+            self.assertEqual(connection.execute_wrappers.count(_record_query), 1)
@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+
+class MediaTraversalTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = Path(tempfile.mkdtemp())
+        cls.addClassCleanup(shutil.rmtree, cls.media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root, DDAM_MEDIA_SENDFILE=""))
+
+        cls.asset_path = f"assets/ab/{'ab' * 32}.jpg"
+        (cls.media_root / "assets" / "ab").mkdir(parents=True)
+        (cls.media_root / cls.asset_path).write_bytes(b"private")
+        (cls.media_root / "branding").mkdir()
+        (cls.media_root / "branding" / "logo.png").write_bytes(b"public")
+
+    def test_branding_is_public(self):
+        response = self.client.get("/media/branding/logo.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"public")
+
+    def test_assets_need_login(self):
+        response = self.client.get(f"/media/{self.asset_path}")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/login/", response["Location"])
+
+    def test_traversal_out_of_a_public_prefix(self):
+        for url in (
+            f"/media/branding/../{self.asset_path}",
+            f"/media/branding/%2e%2e/{self.asset_path}",
+            f"/media/branding/./../{self.asset_path}",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_traversal_when_logged_in(self):
+        user = get_user_model().objects.create_user("user@example.org", "password")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(f"/media/{self.asset_path}").status_code, 200)
+        self.assertEqual(self.client.get(f"/media/assets/../{self.asset_path}").status_code, 404)
+        self.assertEqual(self.client.get("/media//etc/passwd").status_code, 404)
+
+    def test_dot_segments_get_normalized(self):
+        response = self.client.get("/media/branding/./logo.png")
+        self.assertEqual(response.status_code, 200)
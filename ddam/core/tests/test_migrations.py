@@ -0,0 +1,57 @@
+import uuid
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class SearchIndexMigrationTests(TransactionTestCase):
+    """
+    Migrate a database with assets from before the search index to the
+    latest state: migrations must only depend on historical models.
+    """
+    migrate_from = [("core", "0008_chunkedupload")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.migrate_to = executor.loader.graph.leaf_nodes("core")
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+
+        Asset = apps.get_model("core", "Asset")
+        Usage = apps.get_model("core", "Usage")
+        License = apps.get_model("core", "License")
+        usage = Usage.objects.create(title="Annual report")
+        license = License.objects.create(title="Royalty free")
+        self.asset_id = uuid.uuid4()
+        asset = Asset.objects.create(
+            id=self.asset_id,
+            title="Harbour at dawn",
+            filename_orig="harbour.jpg",
+            file="assets/harbour.jpg",
+            description="Fishing boats",
+            copyright_statement="Example Agency",
+            license=license,
+        )
+        asset.usage.add(usage)
+
+    def tearDown(self):
+        # Leave the latest schema for the following tests
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migrate_populated_database(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+
+        from ddam.core.models import Asset
+        from ddam.core.search import search_assets
+
+        for query in ("harbour", "boats", "annual", "royalty", "agency"):
+            with self.subTest(query=query):
+                found = search_assets(Asset.objects.all(), query)
+                self.assertEqual([asset.pk for asset in found], [self.asset_id])
+
+        asset = Asset.objects.get(pk=self.asset_id)
+        self.assertEqual(asset.file_size, 0)
+        self.assertIsNone(asset.width)
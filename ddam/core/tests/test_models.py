@@ -0,0 +1,57 @@
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from ddam.core.models import Asset, Rendition
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class RenditionPurgeTests(TestCase):
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.path = default_storage.save("renditions/ab/ab.10x10.jpg", ContentFile(b"jpeg"))
+
+    def create_rendition(self, title):
+        asset = Asset(title=title, filename_orig="harbour.jpg", checksum="ab" * 32)
+        asset.file.name = "assets/ab/harbour.jpg"
+        Asset.objects.bulk_create([asset])
+        return Rendition.objects.create(
+            asset=asset, preset="large", path=self.path, width=10, height=10,
+            format="JPEG", filesize=4, source_checksum="ab" * 32,
+        )
+
+    def test_file_deleted_on_commit(self):
+        rendition = self.create_rendition("Harbour")
+        with self.captureOnCommitCallbacks(execute=True):
+            rendition.purge()
+            self.assertTrue(default_storage.exists(self.path))
+
+        self.assertFalse(default_storage.exists(self.path))
+
+    def test_rollback_keeps_file(self):
+        rendition = self.create_rendition("Harbour")
+        rendition_id = rendition.pk
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    rendition.purge()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertTrue(Rendition.objects.filter(pk=rendition_id).exists())
+        self.assertTrue(default_storage.exists(self.path))
+
+    def test_shared_file_kept(self):
+        rendition = self.create_rendition("Harbour")
+        self.create_rendition("Harbour copy")
+        with self.captureOnCommitCallbacks(execute=True):
+            rendition.purge()
+
+        self.assertTrue(default_storage.exists(self.path))
@@ -0,0 +1,162 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase, override_settings
+
+from ddam.core.filters import AssetFilter
+from ddam.core.models import Asset
+from ddam.core.pagination import (
+    CURSOR_NEXT,
+    CURSOR_PREVIOUS,
+    DEFAULT_ORDERING,
+    apaginate_keyset,
+    decode_cursor,
+    encode_cursor,
+    paginate_keyset,
+)
+from ddam.core.search import index_assets
+
+
+ASSET_COUNT = 23
+PAGE_SIZE = 5
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def raw_cursor(direction, values):
+    raw = json.dumps([direction, values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Asset.objects.bulk_create([
+            Asset(title=f"Harbour {number:02}", filename_orig=f"{number}.jpg", file=f"assets/{number}.jpg")
+            for number in range(ASSET_COUNT)
+        ])
+        for number, asset in enumerate(Asset.objects.order_by("title")):
+            # Ties in every sort key, no capture date for every third asset
+            asset.created_at = START + timedelta(hours=number // 3)
+            asset.file_size = number % 4 * 1000
+            asset.captured_at = START - timedelta(days=number // 2) if number % 3 else None
+            Asset.objects.filter(pk=asset.pk).update(
+                created_at=asset.created_at,
+                file_size=asset.file_size,
+                captured_at=asset.captured_at,
+            )
+        index_assets(Asset.objects.values_list("pk", flat=True))
+
+    def walk(self, queryset, ordering):
+        """
+        All pages, following the next cursors from the first page and then
+        the previous cursors back from the last one.
+        """
+        # Broken cursors could page in circles
+        max_pages = ASSET_COUNT // PAGE_SIZE + 1
+
+        pages = [paginate_keyset(queryset, page_size=PAGE_SIZE, ordering=ordering)]
+        while pages[-1].has_next and len(pages) <= max_pages:
+            pages.append(paginate_keyset(queryset, pages[-1].next_cursor, PAGE_SIZE, ordering))
+
+        backwards = [pages[-1]]
+        while backwards[-1].has_previous and len(backwards) <= max_pages:
+            backwards.append(paginate_keyset(queryset, backwards[-1].previous_cursor, PAGE_SIZE, ordering))
+        backwards.reverse()
+        return pages, backwards
+
+    def assertPaginates(self, queryset, ordering):
+        expected = list(queryset.order_by(*ordering))
+        pages, backwards = self.walk(queryset, ordering)
+
+        self.assertEqual([asset for page in pages for asset in page.object_list], expected)
+        self.assertEqual(len(pages), -(-len(expected) // PAGE_SIZE))
+        self.assertFalse(pages[0].has_previous)
+        self.assertFalse(pages[-1].has_next)
+        self.assertEqual(
+            [page.object_list for page in backwards],
+            [page.object_list for page in pages],
+        )
+
+    def test_default_ordering(self):
+        self.assertPaginates(Asset.objects.all(), DEFAULT_ORDERING)
+
+    def test_sort_orderings(self):
+        for sort, ordering in AssetFilter.SORT_ORDERINGS.items():
+            with self.subTest(sort=sort):
+                asset_filter = AssetFilter({"sort": sort}, queryset=Asset.objects.all())
+                self.assertEqual(asset_filter.get_ordering(), ordering)
+                self.assertPaginates(asset_filter.qs, ordering)
+
+    def test_sort_without_capture_dates(self):
+        asset_filter = AssetFilter({"sort": "taken"}, queryset=Asset.objects.all())
+        self.assertEqual(
+            asset_filter.qs.count(),
+            Asset.objects.filter(captured_at__isnull=False).count(),
+        )
+
+    def test_search_ordering(self):
+        asset_filter = AssetFilter({"title": "harbour"}, queryset=Asset.objects.all())
+        ordering = asset_filter.get_ordering()
+        self.assertEqual(ordering[0], "search_rank")
+        self.assertPaginates(asset_filter.qs, ordering)
+
+    def test_cursor_round_trip(self):
+        asset = Asset.objects.filter(captured_at__isnull=False).order_by("title").first()
+        for ordering in [DEFAULT_ORDERING, *AssetFilter.SORT_ORDERINGS.values()]:
+            with self.subTest(ordering=ordering):
+                for direction in (CURSOR_NEXT, CURSOR_PREVIOUS):
+                    cursor = encode_cursor(asset, direction, ordering)
+                    self.assertEqual(
+                        decode_cursor(cursor, Asset, ordering),
+                        (direction, [getattr(asset, order.lstrip("-")) for order in ordering]),
+                    )
+
+    def test_invalid_cursors(self):
+        first_page = paginate_keyset(Asset.objects.all(), page_size=PAGE_SIZE)
+        asset = first_page.object_list[-1]
+        valid = encode_cursor(asset, CURSOR_NEXT)
+        cursors = [
+            "",
+            "garbage",
+            "!!!",
+            valid[:-3],
+            raw_cursor("x", [asset.created_at.isoformat(), asset.pk.hex]),
+            raw_cursor(CURSOR_NEXT, [asset.created_at.isoformat()]),
+            # A NULL sort key, rows without one get filtered out
+            raw_cursor(CURSOR_NEXT, [None, asset.pk.hex]),
+            raw_cursor(CURSOR_NEXT, ["yesterday", asset.pk.hex]),
+            raw_cursor(CURSOR_NEXT, [asset.created_at.isoformat(), "not-a-uuid"]),
+            base64.urlsafe_b64encode(b"not json").decode(),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor, Asset, DEFAULT_ORDERING))
+                page = paginate_keyset(Asset.objects.all(), cursor, PAGE_SIZE)
+                self.assertEqual(page.object_list, first_page.object_list)
+                self.assertFalse(page.has_previous)
+
+    def test_cursor_of_other_ordering(self):
+        asset = Asset.objects.first()
+        cursor = encode_cursor(asset, CURSOR_NEXT, ("-captured_at", "-id"))
+        page = paginate_keyset(Asset.objects.all(), cursor, PAGE_SIZE, ("-file_size", "-id"))
+        self.assertFalse(page.has_previous)
+
+    def test_stale_cursor(self):
+        last = Asset.objects.order_by(*DEFAULT_ORDERING).last()
+        cursor = encode_cursor(last, CURSOR_NEXT)
+        page = paginate_keyset(Asset.objects.all(), cursor, PAGE_SIZE)
+        self.assertEqual(page.object_list, list(Asset.objects.order_by(*DEFAULT_ORDERING)[:PAGE_SIZE]))
+
+    async def test_async(self):
+        queryset = Asset.objects.all()
+        first = await apaginate_keyset(queryset, page_size=PAGE_SIZE)
+        second = await apaginate_keyset(queryset, first.next_cursor, PAGE_SIZE)
+        back = await apaginate_keyset(queryset, second.previous_cursor, PAGE_SIZE)
+
+        expected = [asset async for asset in queryset.order_by(*DEFAULT_ORDERING)[:2 * PAGE_SIZE]]
+        self.assertEqual(first.object_list + second.object_list, expected)
+        self.assertEqual(back.object_list, first.object_list)
+        self.assertFalse(back.has_previous)
@@ -0,0 +1,92 @@
+import io
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from moto import mock_aws
+from PIL import Image
+
+from ddam.core.models import Asset, Rendition
+
+
+BUCKET = "ddam-test"
+REGION = "eu-central-1"
+SIGNED_URL_EXPIRE = 600
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    DDAM_S3_SIGNED_URL_EXPIRE=SIGNED_URL_EXPIRE,
+    STORAGES={
+        "default": {
+            "BACKEND": "ddam.core.s3.MediaS3Storage",
+            "OPTIONS": {
+                "bucket_name": BUCKET,
+                "region_name": REGION,
+                "access_key": "testing",
+                "secret_key": "testing",
+                "querystring_expire": SIGNED_URL_EXPIRE,
+                "file_overwrite": True,
+            },
+        },
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class S3MediaTests(TestCase):
+
+    def setUp(self):
+        self.enterContext(mock_aws())
+        boto3.client("s3", region_name=REGION).create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        user = get_user_model().objects.create_user("user@example.org", "password")
+        self.client.force_login(user)
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), "teal").save(buffer, "JPEG")
+        self.asset = Asset(
+            title="Harbour",
+            file=ContentFile(buffer.getvalue(), name="harbour.jpg"),
+            filename_orig="harbour.jpg",
+        )
+        self.asset.save()
+
+    def assertRedirectsToBucket(self, url, name):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Cache-Control"], f"private, max-age={SIGNED_URL_EXPIRE // 2}")
+
+        location = urlsplit(response["Location"])
+        self.assertIn(BUCKET, location.netloc + location.path)
+        self.assertTrue(location.path.endswith(name))
+        query = parse_qs(location.query)
+        self.assertIn("X-Amz-Signature", query)
+        self.assertEqual(query["X-Amz-Expires"], [str(SIGNED_URL_EXPIRE)])
+        self.assertEqual(query["response-cache-control"], ["private, max-age=31536000, immutable"])
+
+    def test_original_redirects_to_presigned_url(self):
+        name = self.asset.file.name
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(self.asset.file.url, f"/media/{name}")
+
+        self.assertRedirectsToBucket(self.asset.file.url, name)
+
+    def test_rendition_redirects_to_presigned_url(self):
+        renditions = Rendition.create_for_asset(self.asset)
+        self.assertTrue(renditions)
+
+        rendition = renditions.fallback
+        self.assertTrue(default_storage.exists(rendition.path))
+        self.assertEqual(default_storage.size(rendition.path), rendition.filesize)
+
+        self.assertRedirectsToBucket(rendition.url, rendition.path)
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(self.asset.file.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(BUCKET, response["Location"])
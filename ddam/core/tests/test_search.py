@@ -0,0 +1,42 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ddam.core.models import Asset
+from ddam.core.search import index_assets, search_assets
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class BulkUpdateIndexTests(TestCase):
+
+    def setUp(self):
+        asset = Asset(title="Harbour", filename_orig="IMG_0001.jpg", file="assets/IMG_0001.jpg")
+        Asset.objects.bulk_create([asset])
+        index_assets([asset.pk])
+        self.asset = asset
+
+    def search(self, value):
+        return list(search_assets(Asset.objects.all(), value))
+
+    def test_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Asset.objects.filter(title="Harbour").update(title="Zebrafish")
+
+        self.assertEqual(self.search("Zebrafish"), [self.asset])
+        self.assertEqual(self.search("Harbour"), [])
+
+    def test_bulk_update(self):
+        self.asset.creator = "Jane Photographer"
+        with self.captureOnCommitCallbacks(execute=True):
+            Asset.objects.bulk_update([self.asset], ["creator"])
+
+        self.assertEqual(self.search("Photographer"), [self.asset])
+
+    def test_unindexed_fields(self):
+        with (
+            mock.patch("ddam.core.search.index_assets") as index,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            Asset.objects.filter(pk=self.asset.pk).update(with_costs=True)
+
+        index.assert_not_called()
@@ -0,0 +1,66 @@
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from ddam.core.image_helpers import RenditionInfo
+from ddam.core.models import Asset, Rendition
+from ddam.core.tasks import generate_renditions, queue_renditions
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class RenditionFailureTests(TestCase):
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def create_asset(self, content):
+        name = default_storage.save("assets/ab/broken.jpg", ContentFile(content))
+        asset = Asset(title="Broken", filename_orig="broken.jpg", checksum="ab" * 32)
+        asset.file.name = name
+        Asset.objects.bulk_create([asset])
+        return Asset.objects.get(pk=asset.pk)
+
+    def queued(self, asset):
+        asset = Asset.objects.get(pk=asset.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            queue_renditions([asset])
+        return len(callbacks)
+
+    def test_corrupt_file_not_queued_again(self):
+        asset = self.create_asset(b"not an image")
+        with self.assertLogs("ddam.core", "WARNING"):
+            self.assertEqual(generate_renditions.call(str(asset.pk)), 0)
+
+        asset.refresh_from_db()
+        self.assertEqual(asset.rendition_failed_checksum, asset.checksum)
+        self.assertEqual(self.queued(asset), 0)
+
+    def test_missing_file_not_queued_again(self):
+        asset = self.create_asset(b"")
+        default_storage.delete(asset.file.name)
+        with self.assertLogs("ddam.core.tasks", "WARNING"):
+            self.assertEqual(generate_renditions.call(str(asset.pk)), 0)
+
+        self.assertEqual(self.queued(asset), 0)
+
+    def test_changed_file_queued_again(self):
+        asset = self.create_asset(b"not an image")
+        Asset.objects.filter(pk=asset.pk).update(rendition_failed_checksum=asset.checksum)
+        Asset.objects.filter(pk=asset.pk).update(checksum="cd" * 32)
+
+        self.assertEqual(self.queued(asset), 1)
+
+    def test_stored_renditions_clear_failure(self):
+        asset = self.create_asset(b"not an image")
+        Asset.objects.filter(pk=asset.pk).update(rendition_failed_checksum=asset.checksum)
+        asset.refresh_from_db()
+
+        Rendition.store_for_asset(asset, [
+            RenditionInfo("large", "renditions/ab/x.jpg", 10, 10, "JPEG", 100, 10, 10),
+        ], asset.checksum)
+
+        asset.refresh_from_db()
+        self.assertEqual(asset.rendition_failed_checksum, "")
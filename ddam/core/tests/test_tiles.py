@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ddam.core.models import Asset
+from ddam.core.tiles import render_asset_tiles, render_to_string
+
+
+# Browsing a few pages of the asset list, as many tiles as scrolling loads
+PAGES = 3
+PAGE_SIZE = 200
+
+
+class TileCacheTests(TestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        # The default file cache, with its configured size
+        caches = {"default": {**settings.CACHES["default"], "LOCATION": cache_dir}}
+        self.enterContext(override_settings(CACHES=caches))
+
+        Asset.objects.bulk_create([
+            Asset(title=f"Asset {number}", filename_orig=f"{number}.jpg", file=f"assets/{number}.jpg")
+            for number in range(PAGES * PAGE_SIZE)
+        ])
+        self.assets = list(
+            Asset
+            .objects
+            .select_related("license")
+            .prefetch_related("renditions")
+            .order_by("title")
+        )
+        self.pages = [
+            self.assets[start:start + PAGE_SIZE]
+            for start in range(0, len(self.assets), PAGE_SIZE)
+        ]
+
+    def test_second_render_is_served_from_the_cache(self):
+        first = render_asset_tiles(self.pages[0])
+        for page in self.pages[1:]:
+            render_asset_tiles(page)
+
+        get_many = cache.get_many
+        found = []
+
+        def spy(keys):
+            found.append(get_many(keys))
+            return found[-1]
+
+        with (
+            mock.patch("ddam.core.tiles.render_to_string", wraps=render_to_string) as render,
+            mock.patch.object(cache, "get_many", side_effect=spy),
+        ):
+            second = render_asset_tiles(self.pages[0])
+
+        render.assert_not_called()
+        self.assertEqual(len(found), 1)
+        self.assertEqual(len(found[0]), PAGE_SIZE)
+        self.assertEqual([html for _asset, html in second], [html for _asset, html in first])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class FailedTileTests(TestCase):
+
+    def test_failed_renditions(self):
+        Asset.objects.bulk_create([
+            Asset(title="Broken", filename_orig="broken.jpg", file="assets/broken.jpg", checksum="ab" * 32),
+        ])
+        assets = Asset.objects.select_related("license").prefetch_related("renditions")
+
+        [(_asset, html)] = render_asset_tiles(list(assets))
+        self.assertIn("Preview pending", html)
+
+        # As set by `tasks.generate_renditions`, keeping `updated_at`
+        assets.update(rendition_failed_checksum="ab" * 32)
+
+        [(_asset, html)] = render_asset_tiles(list(assets))
+        self.assertIn("No preview available", html)
+        self.assertNotIn("Preview pending", html)
@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ddam.core.models import Asset, ChunkedUpload
+
+
+CHUNK_SIZE = 256
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.effect_noise((64, 64), 64).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload_metadata(**values):
+    return ",".join(
+        f"{key} {base64.b64encode(value.encode()).decode()}"
+        for key, value in values.items()
+    )
+
+
+def upload_checksum(chunk):
+    return f"sha256 {base64.b64encode(hashlib.sha256(chunk).digest()).decode()}"
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    DDAM_CHUNKED_UPLOAD_CHUNK_SIZE=CHUNK_SIZE,
+)
+class ChunkedUploadTests(TestCase):
+
+    def setUp(self):
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(
+            MEDIA_ROOT=root / "media",
+            DDAM_CHUNKED_UPLOAD_ROOT=root / "uploads",
+        ))
+        user = get_user_model().objects.create_user("user@example.org", "password")
+        self.client.force_login(user)
+        self.content = png_bytes()
+        self.assertGreater(len(self.content), 2 * CHUNK_SIZE)
+
+    def create_upload(self):
+        response = self.client.post(
+            reverse("core:chunked-upload-create"),
+            headers={
+                "Upload-Length": str(len(self.content)),
+                "Upload-Metadata": upload_metadata(filename="noise.png", title="Noise"),
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Upload-Chunk-Size"], str(CHUNK_SIZE))
+        return response["Location"]
+
+    def send_chunk(self, url, offset, chunk=None):
+        if chunk is None:
+            chunk = self.content[offset:offset + CHUNK_SIZE]
+        return self.client.patch(
+            url,
+            chunk,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": str(offset), "Upload-Checksum": upload_checksum(chunk)},
+        )
+
+    def send_all(self, url):
+        for offset in range(0, len(self.content), CHUNK_SIZE):
+            response = self.send_chunk(url, offset)
+            self.assertEqual(response.status_code, 204)
+        return response
+
+    def test_offset_mismatch(self):
+        url = self.create_upload()
+        self.assertEqual(self.send_chunk(url, 0).status_code, 204)
+
+        response = self.send_chunk(url, 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], CHUNK_SIZE)
+
+        response = self.send_chunk(url, 2 * CHUNK_SIZE)
+        self.assertEqual(response.status_code, 409)
+
+    def test_head_returns_resume_offset(self):
+        url = self.create_upload()
+        self.assertEqual(self.client.head(url)["Upload-Offset"], "0")
+
+        self.send_chunk(url, 0)
+        response = self.client.head(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Upload-Offset"], str(CHUNK_SIZE))
+        self.assertEqual(response["Upload-Length"], str(len(self.content)))
+
+    def test_checksum_mismatch_keeps_offset(self):
+        url = self.create_upload()
+        chunk = self.content[:CHUNK_SIZE]
+        response = self.client.patch(
+            url,
+            chunk,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": "0", "Upload-Checksum": upload_checksum(b"other")},
+        )
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(self.client.head(url)["Upload-Offset"], "0")
+
+    def test_completion_creates_asset(self):
+        url = self.create_upload()
+        response = self.send_all(url)
+
+        asset = Asset.objects.get(title="Noise")
+        self.assertEqual(response["Asset-Location"], asset.get_absolute_url())
+        self.assertEqual(asset.filename_orig, "noise.png")
+        self.assertEqual(asset.checksum, hashlib.sha256(self.content).hexdigest())
+        with asset.file.open("rb") as stored:
+            self.assertEqual(stored.read(), self.content)
+
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(upload.asset, asset)
+        self.assertFalse(upload.part_path.exists())
+
+    def test_patch_after_completion(self):
+        url = self.create_upload()
+        self.send_all(url)
+
+        response = self.send_chunk(url, len(self.content), b"more")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Asset.objects.count(), 1)
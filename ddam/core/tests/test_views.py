@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ddam.core.models import Asset
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class AssetDetailTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("user@example.org", "password")
+        self.client.force_login(user)
+
+    def test_metadata_not_yet_extracted(self):
+        # As left by the migration adding the metadata columns
+        asset = Asset(title="Harbour", filename_orig="harbour.jpg", checksum="ab" * 32)
+        asset.file.name = "assets/ab/harbour.jpg"
+        Asset.objects.bulk_create([asset])
+
+        response = self.client.get(asset.get_absolute_url())
+        self.assertContains(response, "size unknown")
+        self.assertNotContains(response, "0\xa0bytes")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("user@example.org", "password")
+        self.client.force_login(self.user)
+        self.asset = Asset(title="Harbour", filename_orig="harbour.jpg", file="assets/harbour.jpg")
+        Asset.objects.bulk_create([self.asset])
+        self.url = reverse("core:asset-list")
+
+    def get_etag(self, client=None, **headers):
+        response = (client or self.client).get(self.url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_not_modified(self):
+        for url in (self.url, self.asset.get_absolute_url()):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, headers={"If-None-Match": etag})
+                self.assertEqual(response.status_code, 304)
+                # Only the session and the user get loaded
+                self.assertEqual([query["sql"] for query in queries if "core_" in query["sql"]], [])
+
+    def test_changed_after_commit(self):
+        etag = self.get_etag()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.asset.title = "Zebrafish"
+            self.asset.save()
+            # Not yet committed: other requests still see the old data
+            response = self.client.get(self.url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, "Zebrafish")
+
+    def test_other_user(self):
+        etag = self.get_etag()
+
+        other_user = get_user_model().objects.create_user("other@example.org", "password")
+        other_client = Client()
+        other_client.force_login(other_user)
+        # Same CSRF secret, only the user differs
+        other_client.cookies[settings.CSRF_COOKIE_NAME] = self.client.cookies[settings.CSRF_COOKIE_NAME].value
+
+        response = other_client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_htmx_fragment(self):
+        etag = self.get_etag()
+        fragment_etag = self.get_etag(HX_Request="true")
+        self.assertNotEqual(fragment_etag, etag)
+
+        response = self.client.get(self.url, headers={"HX-Request": "true", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, headers={"HX-Request": "true", "If-None-Match": fragment_etag})
+        self.assertEqual(response.status_code, 304)
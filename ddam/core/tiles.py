@@ -0,0 +1,64 @@
+"""
+Cached rendering of the asset grid tiles.
+
+A tile only changes with its asset, its license, its renditions or their
+failure, so the rendered markup is cached under a key made of exactly
+those. A page of tiles is looked up with one `cache.get_many`, only misses
+get rendered.
+Changed assets get new keys, old entries just expire. The cache has to
+hold about one tile per asset browsed, see `CACHES` in the settings.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .instrumentation import record
+
+
+TILE_TEMPLATE = "core/includes/asset_list_item.html"
+
+# Bump when the tile templates change, to not serve outdated markup
+TILE_CACHE_VERSION = 2
+
+
+def get_tile_cache_key(asset):
+    """
+    Expects `license` selected and `renditions` prefetched, like the asset
+    list does, so building the key costs no queries.
+    """
+    renditions = asset.get_image_renditions
+    license_version = f"{asset.license.pk}.{asset.license.updated_at.timestamp():.6f}" if asset.license else "-"
+    return ":".join([
+        f"ddam:tile:{TILE_CACHE_VERSION}",
+        str(asset.pk),
+        f"{asset.updated_at.timestamp():.6f}",
+        license_version,
+        renditions.version if renditions else "-",
+        # Set without touching `updated_at`, see `tasks.generate_renditions`
+        "failed" if asset.renditions_failed else "-",
+    ])
+
+
+def render_asset_tiles(assets):
+    """
+    The rendered tiles of `assets` as list of `(asset, html)`, in order.
+    """
+    keys = [get_tile_cache_key(asset) for asset in assets]
+    cached = cache.get_many(keys)
+
+    rendered = {}
+    tiles = []
+    for asset, key in zip(assets, keys):
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string(TILE_TEMPLATE, {"asset": asset})
+            rendered[key] = html
+        tiles.append((asset, mark_safe(html)))
+
+    record("tile_hit", len(assets) - len(rendered))
+    record("tile_miss", len(rendered))
+    if rendered:
+        cache.set_many(rendered, settings.DDAM_TILE_CACHE_TIMEOUT)
+    return tiles
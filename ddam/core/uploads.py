@@ -0,0 +1,325 @@
+"""
+Bulk ingest of uploaded files into assets.
+
+Each file gets validated and stored on its own: one bad file does not
+abort the whole upload. File work (validation, checksumming, storing)
+runs in a bounded thread pool, database work stays in the calling thread
+and is committed in batches.
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import IntegrityError, transaction
+
+from .image_helpers import get_filelike_checksum
+from .models import Asset
+from .search import index_assets
+from .similarity import rank_similar, similar_hashes_filter
+from .storage import get_existing_names
+
+
+logger = logging.getLogger(__name__)
+
+UploadResult = namedtuple("UploadResult", "filename status asset reason")
+
+STATUS_CREATED = "created"
+STATUS_DUPLICATE = "duplicate"
+STATUS_REJECTED = "rejected"
+
+
+def _validate_and_checksum(uploaded_file):
+    """
+    Runs in a pool thread. Returns `(checksum, probe, reason)`, the reason
+    being set for files failing the validators of `Asset.file`.
+    """
+    try:
+        Asset._meta.get_field("file").run_validators(uploaded_file)
+    except ValidationError as error:
+        return None, None, " ".join(error.messages)
+
+    return get_filelike_checksum(uploaded_file), uploaded_file.probe, None
+
+
+def _create_batch(assets):
+    """
+    Create a batch of assets in one transaction. If a concurrent request
+    took one of the titles meanwhile, fall back to one savepoint per asset
+    to only lose the conflicting ones.
+    """
+    try:
+        with transaction.atomic():
+            Asset.objects.bulk_create(assets)
+        return assets, []
+    except IntegrityError:
+        pass
+
+    created, conflicting = [], []
+    for asset in assets:
+        try:
+            with transaction.atomic():
+                asset.save(force_insert=True)
+            created.append(asset)
+        except IntegrityError:
+            conflicting.append(asset)
+    return created, conflicting
+
+
+def ingest_files(files, created_by=""):
+    """
+    Validate, store and create an asset for each uploaded file, the title
+    being the filename. Returns one `UploadResult` per file, in order.
+    """
+    results = [None] * len(files)
+    storage = Asset._meta.get_field("file").storage
+
+    with ThreadPoolExecutor(max_workers=settings.DDAM_UPLOAD_WORKERS) as executor:
+        checked = list(executor.map(_validate_and_checksum, files))
+
+        # Titles must be unique: look up all of them in one query
+        titles = {f.name for f in files}
+        taken_titles = set(
+            Asset.objects.filter(title__in=titles).values_list("title", flat=True)
+        )
+
+        # Identical files get linked to the already stored blob
+        checksums = {checksum for checksum, _probe, _reason in checked if checksum}
+        stored_blobs = dict(
+            Asset
+            .objects
+            .filter(checksum__in=checksums)
+            .values_list("checksum", "file")
+        )
+
+        new_assets = []
+        blobs_to_store = {}
+        notes = {}
+
+        for index, (uploaded_file, (checksum, probe, reason)) in enumerate(zip(files, checked)):
+            if reason:
+                logger.info("Rejected upload %s: %s", uploaded_file.name, reason)
+                results[index] = UploadResult(uploaded_file.name, STATUS_REJECTED, None, reason)
+                continue
+
+            if uploaded_file.name in taken_titles:
+                reason = "An asset with this title already exists."
+                results[index] = UploadResult(uploaded_file.name, STATUS_DUPLICATE, None, reason)
+                continue
+            taken_titles.add(uploaded_file.name)
+
+            asset = Asset(
+                title=uploaded_file.name,
+                filename_orig=uploaded_file.name,
+                checksum=checksum,
+                created_by=created_by,
+            )
+            asset.set_dhash(probe.dhash)
+            asset.set_metadata(probe.metadata, probe.size)
+            if checksum in stored_blobs:
+                asset.file.name = stored_blobs[checksum]
+                notes[index] = "Identical to an already stored file, linked to it."
+            elif checksum in blobs_to_store:
+                notes[index] = "Identical to another file of this upload, linked to it."
+            else:
+                blob_name = asset.file.field.generate_filename(asset, uploaded_file.name)
+                blobs_to_store[checksum] = (blob_name, uploaded_file)
+
+            new_assets.append((index, asset))
+
+        # Blobs are content addressed: an existing one is identical, e.g. of
+        # a deleted asset. Checked for all at once, with object storages
+        # each check is a request.
+        existing_blobs = get_existing_names(
+            storage,
+            [blob_name for blob_name, _uploaded_file in blobs_to_store.values()],
+        )
+        saved_blobs = {
+            checksum: executor.submit(storage.save, blob_name, uploaded_file)
+            for checksum, (blob_name, uploaded_file) in blobs_to_store.items()
+            if blob_name not in existing_blobs
+        }
+        for checksum, (blob_name, _uploaded_file) in blobs_to_store.items():
+            future = saved_blobs.get(checksum)
+            stored_blobs[checksum] = future.result() if future else blob_name
+
+    for _index, asset in new_assets:
+        if not asset.file.name:
+            asset.file.name = stored_blobs[asset.checksum]
+
+    batch_size = settings.DDAM_UPLOAD_BATCH_SIZE
+    created_count = 0
+    for start in range(0, len(new_assets), batch_size):
+        batch = new_assets[start:start + batch_size]
+        created, _conflicting = _create_batch([asset for _index, asset in batch])
+        created_ids = {asset.pk for asset in created}
+        created_count += len(created)
+        # bulk_create sends no signals
+        index_assets(created_ids)
+
+        for index, asset in batch:
+            if asset.pk in created_ids:
+                results[index] = UploadResult(asset.title, STATUS_CREATED, asset, notes.get(index, ""))
+            else:
+                reason = "An asset with this title already exists."
+                results[index] = UploadResult(asset.title, STATUS_DUPLICATE, None, reason)
+
+        logger.info("Bulk upload: created %d of %d files", created_count, len(files))
+
+    _add_similar_notes(results)
+    return results
+
+
+def _add_similar_notes(results):
+    """
+    Warn about created assets looking like other assets, already stored
+    ones or of this upload. One query for all of them.
+    """
+    created = {
+        result.asset.pk: index
+        for index, result in enumerate(results)
+        if result.status == STATUS_CREATED and result.asset.dhash is not None
+    }
+    if not created:
+        return
+
+    max_distance = settings.DDAM_SIMILAR_MAX_DISTANCE
+    hashes = [results[index].asset.dhash for index in created.values()]
+    candidates = list(
+        Asset
+        .objects
+        .filter(similar_hashes_filter(hashes, max_distance))
+        .only("id", "title", "dhash")
+    )
+
+    for pk, index in created.items():
+        result = results[index]
+        others = [
+            candidate for candidate in candidates
+            if candidate.pk != pk and candidate.dhash is not None
+        ]
+        similar = rank_similar(result.asset.dhash, others, max_distance)
+        if similar:
+            titles = ", ".join(f'"{other.title}"' for other in similar[:3])
+            note = " ".join(filter(None, [result.reason, f"Looks similar to {titles}."]))
+            results[index] = result._replace(reason=note)
+
+
+class ChunkRejected(Exception):
+    """
+    A chunk that can not be appended to a `ChunkedUpload`. `status` is the
+    HTTP status to answer with.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Status of the tus checksum extension for a chunk not matching its checksum
+STATUS_CHECKSUM_MISMATCH = 460
+
+
+def parse_upload_metadata(header):
+    """
+    Parse a tus `Upload-Metadata` header: comma separated `key base64value`
+    pairs.
+    """
+    metadata = {}
+    for pair in filter(None, (part.strip() for part in header.split(","))):
+        key, _sep, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            raise ChunkRejected(f"Invalid Upload-Metadata value for {key}.")
+    return metadata
+
+
+def parse_upload_checksum(header):
+    """
+    Parse a tus `Upload-Checksum` header, `sha256 <base64 digest>`, into
+    the raw digest.
+    """
+    algorithm, _sep, value = header.strip().partition(" ")
+    if algorithm != "sha256":
+        raise ChunkRejected("Upload-Checksum must be given as sha256.")
+    try:
+        return base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raise ChunkRejected("Invalid Upload-Checksum digest.")
+
+
+def append_chunk(upload, stream, offset, checksum_header, read_size=64 * 1024):
+    """
+    Append the next chunk, read from `stream`, to the part file of `upload`.
+
+    Every chunk but the last must be exactly `upload.chunk_size` bytes and
+    is streamed to disk while being hashed. A chunk not matching its
+    checksum is cut off again, so the client can simply resend it.
+    """
+    if upload.is_complete:
+        raise ChunkRejected("Upload is already complete.", 409)
+    if offset != upload.offset:
+        raise ChunkRejected(f"Upload-Offset must be {upload.offset}.", 409)
+
+    expected_digest = parse_upload_checksum(checksum_header)
+    chunk_length = min(upload.chunk_size, upload.size - upload.offset)
+
+    part_path = upload.part_path
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path.touch()
+
+    checksum = hashlib.sha256()
+    received = 0
+    with open(part_path, "r+b") as part:
+        # Drop leftovers of an interrupted chunk
+        part.truncate(upload.offset)
+        part.seek(upload.offset)
+
+        # Read one byte more than expected to detect oversized chunks
+        while received <= chunk_length:
+            data = stream.read(min(read_size, chunk_length + 1 - received))
+            if not data:
+                break
+            checksum.update(data)
+            part.write(data)
+            received += len(data)
+
+        if received != chunk_length:
+            part.truncate(upload.offset)
+            raise ChunkRejected(f"Chunk must be {chunk_length} bytes, got {received}.")
+        if checksum.digest() != expected_digest:
+            part.truncate(upload.offset)
+            raise ChunkRejected("Chunk does not match Upload-Checksum.", STATUS_CHECKSUM_MISMATCH)
+
+    upload.offset += received
+    upload.save(update_fields=["offset", "updated_at"])
+
+
+def complete_upload(upload):
+    """
+    Turn a completely received upload into an asset, running the same
+    validators as every other upload. Raises `ValidationError`, the upload
+    is kept then and can be deleted by the client.
+    """
+    with open(upload.part_path, "rb") as part:
+        asset = Asset(
+            title=upload.title,
+            file=File(part, name=upload.filename),
+            filename_orig=upload.filename,
+            created_by=upload.created_by,
+        )
+        asset.full_clean()
+        asset.save()
+
+    upload.asset = asset
+    upload.save(update_fields=["asset", "updated_at"])
+    upload.part_path.unlink(missing_ok=True)
+    logger.info("Chunked upload %s completed as asset %s", upload.pk, asset.pk)
+    return asset
@@ -7,6 +7,8 @@ app_name = 'core'
 urlpatterns = [
     path('', views.asset_filter_list, name="asset-list"),
     path('upload/', views.MultiFileFieldFormView.as_view(), name='asset-upload-multiple'),
+    path('upload/chunked/', views.chunked_upload_create, name='chunked-upload-create'),
+    path('upload/chunked/<uuid:id>/', views.chunked_upload_detail, name='chunked-upload-detail'),
     path('create/', views.AssetCreate.as_view(), name='asset-create'),
     path('<uuid:id>/', views.AssetDetailView.as_view(), name='asset-detail'),
     path('<uuid:id>/update/', views.AssetUpdate.as_view(), name='asset-update'),
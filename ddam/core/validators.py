@@ -1,5 +1,6 @@
 import os
 import mimetypes
+from collections import namedtuple
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -9,42 +10,79 @@ from django.template.defaultfilters import filesizeformat
 from django.utils.translation import gettext_lazy as _
 
 import magic
+from PIL import Image
 
+from .image_helpers import RENDITION_FORMATS, get_opened_image_dhash
+from .metadata import SVG_METADATA, read_image_metadata
+from .metrics import UPLOAD_BYTES, UPLOAD_REJECTIONS, UPLOADS
 
-def _get_mimetypes_for_extensions(file_extensions: list) -> list:
+
+# Bytes libmagic needs to tell the file type
+MAGIC_HEADER_SIZE = 2048
+
+# Not known to `mimetypes` on all Python versions
+_KNOWN_MIMETYPES = {extension: mime_type for extension, mime_type in RENDITION_FORMATS.values()}
+
+FileProbe = namedtuple("FileProbe", "mime_type extension size metadata dhash")
+FileProbe.__doc__ = """
+What validating a file found out about it, attached to the validated file
+as `probe`: `metadata` is an `ImageMetadata`, vector files have no `dhash`.
+"""
+
+
+def _get_mimetypes_for_extensions(file_extensions: list) -> dict:
     """
-    Todo: also check for common, but not standardized mime types:
-    https://docs.python.org/3.7/library/mimetypes.html#mimetypes.common_types
+    Map file extensions, without leading dot, to their mime type.
     """
-    valid_mimetypes = []
+    valid_mimetypes = {}
     for ext in file_extensions:
-        if not ext.startswith('.'):
-            ext = "." + ext
-
-        if mimetypes.types_map.get(ext):
-            valid_mimetypes.append(mimetypes.types_map.get(ext))
+        ext = ext.lower().lstrip('.')
+        mime_type = mimetypes.types_map.get("." + ext) or _KNOWN_MIMETYPES.get(ext)
+        if mime_type:
+            valid_mimetypes[ext] = mime_type
 
     return valid_mimetypes
 
 
+# Allow-lists, built once
+VALID_FILE_EXTENSIONS = [ext.lower() for ext in settings.DDAM_ASSET_VALID_FILE_EXTENSIONS]
+VALID_MIMETYPES_BY_EXTENSION = _get_mimetypes_for_extensions(VALID_FILE_EXTENSIONS)
+VALID_MIMETYPES = sorted(set(VALID_MIMETYPES_BY_EXTENSION.values()))
+VECTOR_MIMETYPES = {"image/svg+xml"}
+
+_validate_extension = FileExtensionValidator(allowed_extensions=VALID_FILE_EXTENSIONS)
+
+
 def validate_fileextension(value):
     """
     Validate if file extension is in list of allowed file extensions.
     """
-    DDAM_ASSET_VALID_FILE_EXTENSIONS = settings.DDAM_ASSET_VALID_FILE_EXTENSIONS
-    return FileExtensionValidator(allowed_extensions=DDAM_ASSET_VALID_FILE_EXTENSIONS)(value)
+    return _validate_extension(value)
+
+
+def _sniff_mimetype(value):
+    """
+    The mime type of a file object as told by libmagic, leaving the file
+    position at the start.
+    """
+    value.seek(0)
+    try:
+        return magic.from_buffer(value.read(MAGIC_HEADER_SIZE), mime=True)
+    finally:
+        value.seek(0)
+
+
+def _check_mimetype(file_mime_type):
+    if file_mime_type not in VALID_MIMETYPES:
+        _msg = f'Unsupported file type. Valid mime types: `{", ".join(VALID_MIMETYPES)}`, got `{file_mime_type}`!'
+        raise ValidationError(_msg, code="invalid_mimetype")
 
 
 def validate_filetype(value):
     """
     Validate if mime type of uploaded file is in list of allowed mime types.
     """
-    valid_mime_types = _get_mimetypes_for_extensions(settings.DDAM_ASSET_VALID_FILE_EXTENSIONS)
-    file_mime_type = magic.from_buffer(value.read(2048), mime=True)
-
-    if file_mime_type not in valid_mime_types:
-        _msg = f'Unsupported file type. Valid mime types: `{", ".join(valid_mime_types)}`, got `{file_mime_type}`!'
-        raise ValidationError(_msg)
+    _check_mimetype(_sniff_mimetype(value))
 
 
 def validate_filesize(value):
@@ -56,3 +94,82 @@ def validate_filesize(value):
         message = _(f'Please keep file size under {filesizeformat(max_file_size)}. Current size is {filesizeformat(value.size)}.')
         code = "max_filesize_exceeded"
         raise forms.ValidationError(message, code=code)
+
+
+def _probe_image(value):
+    """
+    Check the pixel count from the image header and let Pillow check the
+    file for corruption. A verified image can not be used any further, the
+    second open reads the metadata and computes the dHash. Returns
+    `(metadata, dhash)`.
+    """
+    max_pixels = settings.DDAM_ASSET_MAX_PIXELS
+    try:
+        with Image.open(value) as img:
+            width, height = img.size
+            if width * height > max_pixels:
+                raise ValidationError(
+                    f"Image is too large: {width}x{height} pixels, at most {max_pixels / 1_000_000:g} megapixels are allowed.",
+                    code="max_pixels_exceeded",
+                )
+            img.verify()
+
+        value.seek(0)
+        with Image.open(value) as img:
+            return read_image_metadata(img), get_opened_image_dhash(img)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as error:
+        raise ValidationError(f"Corrupt or unreadable image file: {error}", code="invalid_image")
+    finally:
+        value.seek(0)
+
+
+def probe_file(value):
+    """
+    Validate an uploaded asset file in one pass and return its `FileProbe`.
+
+    The cheap checks come first: extension and size need no reading at all,
+    the mime type only the header. Raster images then get their pixel count
+    checked before anything gets decoded and are verified by Pillow.
+    """
+    validate_fileextension(value)
+    validate_filesize(value)
+
+    extension = os.path.splitext(value.name)[1].lower().lstrip(".")
+    file_mime_type = _sniff_mimetype(value)
+    _check_mimetype(file_mime_type)
+    if file_mime_type != VALID_MIMETYPES_BY_EXTENSION.get(extension):
+        raise ValidationError(
+            f"File extension `.{extension}` does not match the file type `{file_mime_type}`.",
+            code="extension_mismatch",
+        )
+
+    if file_mime_type in VECTOR_MIMETYPES:
+        return FileProbe(file_mime_type, extension, value.size, SVG_METADATA, None)
+
+    metadata, dhash = _probe_image(value)
+    return FileProbe(
+        mime_type=file_mime_type,
+        extension=extension,
+        size=value.size,
+        metadata=metadata,
+        dhash=dhash,
+    )
+
+
+def validate_asset_file(value):
+    """
+    Field validator running `probe_file`, the result is kept as `probe` on
+    the file for the following steps of the upload. Already stored files
+    were validated when they got uploaded.
+    """
+    if getattr(value, "_committed", False):
+        return
+
+    try:
+        value.probe = probe_file(value)
+    except ValidationError as error:
+        UPLOADS.labels("rejected").inc()
+        UPLOAD_REJECTIONS.labels(error.code or "invalid").inc()
+        raise
+    UPLOADS.labels("accepted").inc()
+    UPLOAD_BYTES.inc(value.size)
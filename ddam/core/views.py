@@ -1,62 +1,275 @@
-from django.db.models import Count, Case, Value, When
-from django.shortcuts import render
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.template.response import TemplateResponse
 from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.translation import ngettext
 from django.views.generic.list import ListView
 from django.views.generic.edit import CreateView, UpdateView, FormView
 from django.views.generic.detail import DetailView
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.mixins import LoginRequiredMixin
-
-from .models import Asset, License, Usage, Dealer
+from django.template.defaultfilters import filesizeformat
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from django.views.decorators.vary import vary_on_headers
+
+from .catalogue import catalogue_etag, catalogue_last_modified
+from .media import amedia_response, is_public_media, media_response, normalize_media_path
+from .metrics import is_metrics_request_allowed, render_metrics
+from .models import Asset, ChunkedUpload, License, Usage, Dealer
 from .filters import AssetFilter
 from .forms import MultiFileFieldForm, AssetForm
+from .tasks import queue_renditions
+from .tiles import render_asset_tiles
+from .uploads import (
+    STATUS_CREATED,
+    ChunkRejected,
+    append_chunk,
+    complete_upload,
+    ingest_files,
+    parse_upload_metadata,
+)
+
+
+# Let browsers revalidate catalogue pages, answered with 304 if unchanged
+catalogue_condition = condition(etag_func=catalogue_etag, last_modified_func=catalogue_last_modified)
+revalidate = cache_control(private=True, no_cache=True)
+
+
+def preload_user(view):
+    """
+    For async views: load the user, and with it the session, via the async
+    ORM. Sync code running in the event loop, like `catalogue_etag`, can
+    then use `request.user` and messages without database queries.
+    """
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        request.user = await request.auser()
+        return await view(request, *args, **kwargs)
+    return inner
 
 
 @login_required
-def asset_filter_list(request):
+@preload_user
+@vary_on_headers("HX-Request", "HX-History-Restore-Request")
+@revalidate
+@catalogue_condition
+async def asset_filter_list(request):
+    """
+    The asset grid. htmx requests get fragments only: the next tiles when
+    scrolling down, the results and the refreshed filter form when the
+    filters change.
+    """
     queryset = (
         Asset
         .objects
         .select_related("license")
-        .order_by("-created_at")
+        .prefetch_related("renditions")
+        .order_by("-created_at", "-id")
     )
     asset_filter = AssetFilter(request.GET, queryset=queryset)
-    return render(request, 'core/asset_filter_list.html', {'filter': asset_filter})
+    # Validating looks up the chosen usages, licenses and dealers
+    await sync_to_async(asset_filter.is_valid)()
+    page = await asset_filter.apaginate(cursor=request.GET.get("cursor"))
+    await sync_to_async(queue_renditions)(page.object_list)
+    context = {
+        'filter': asset_filter,
+        'page': page,
+        'tiles': await sync_to_async(render_asset_tiles)(page.object_list),
+    }
+
+    if request.htmx and not request.htmx.history_restore_request:
+        if request.GET.get("cursor"):
+            return TemplateResponse(request, 'core/includes/asset_tiles.html', context)
+        template_name = 'core/includes/asset_filter_update.html'
+    else:
+        template_name = 'core/asset_filter_list.html'
+
+    # Rendered by Django in sync code, the form's choices get queried then
+    await sync_to_async(asset_filter.label_facets)()
+    return TemplateResponse(request, template_name, context)
 
 
 class MultiFileFieldFormView(LoginRequiredMixin, FormView):
     form_class = MultiFileFieldForm
     template_name = 'core/asset_upload_multiple.html'
-    success_url = '/'  # Replace with your URL or reverse().
-
-    def post(self, request, *args, **kwargs):
-        form_class = self.get_form_class()
-        form = self.get_form(form_class)
-        files = request.FILES.getlist('file_field')
-        if form.is_valid():
-            assets_upload = []
-
-            for f in files:
-                print(f"{f=}")  # Do something with each file.
-                asset = Asset(
-                    file=f,
-                    title=f.name,
-                    filename_orig=f.name,
-                    created_by=request.user.email,
-                )
-                assets_upload.append(asset)
-            
-            print(f"{assets_upload=}")
-            Asset.objects.bulk_create(assets_upload)
-
-            return self.form_valid(form)
-        else:
-            return self.form_invalid(form)
-
-
-class AssetDetailView(LoginRequiredMixin, DetailView):
+
+    def form_valid(self, form):
+        files = self.request.FILES.getlist('file_field')
+        results = ingest_files(files, created_by=self.request.user.email)
+
+        created_assets = [result.asset for result in results if result.status == STATUS_CREATED]
+        queue_renditions(created_assets)
+
+        messages.info(self.request, ngettext(
+            '%(created)d of %(total)d file was uploaded.',
+            '%(created)d of %(total)d files were uploaded.',
+            len(files),
+        ) % {'created': len(created_assets), 'total': len(files)})
+
+        return self.render_to_response(self.get_context_data(
+            form=self.form_class(),
+            results=results,
+        ))
+
+
+def _chunked_upload_response(upload, status=204):
+    response = HttpResponse(status=status)
+    response["Upload-Offset"] = upload.offset
+    response["Upload-Length"] = upload.size
+    response["Upload-Chunk-Size"] = upload.chunk_size
+    response["Cache-Control"] = "no-store"
+    if upload.asset_id:
+        response["Asset-Location"] = reverse("core:asset-detail", kwargs={"id": upload.asset_id})
+    return response
+
+
+@login_required
+@require_POST
+def chunked_upload_create(request):
+    """
+    Start a resumable upload. Expects the total size in `Upload-Length` and
+    at least the filename in `Upload-Metadata`, answers with the upload URL
+    in `Location` and the chunk size to use in `Upload-Chunk-Size`.
+    """
+    try:
+        size = int(request.headers.get("Upload-Length", ""))
+        metadata = parse_upload_metadata(request.headers.get("Upload-Metadata", ""))
+    except ValueError:
+        return JsonResponse({"error": "Upload-Length is required."}, status=400)
+    except ChunkRejected as error:
+        return JsonResponse({"error": str(error)}, status=error.status)
+
+    filename = metadata.get("filename", "").strip()
+    if not filename or size < 1:
+        return JsonResponse({"error": "A filename and a positive Upload-Length are required."}, status=400)
+
+    max_file_size = settings.DDAM_ASSET_MAX_FILESIZE
+    if size > max_file_size:
+        message = f"Please keep file size under {filesizeformat(max_file_size)}."
+        return JsonResponse({"error": message}, status=413)
+
+    upload = ChunkedUpload.objects.create(
+        filename=filename,
+        title=metadata.get("title", "").strip() or filename,
+        size=size,
+        chunk_size=settings.DDAM_CHUNKED_UPLOAD_CHUNK_SIZE,
+        created_by=request.user.email,
+    )
+    response = _chunked_upload_response(upload, status=201)
+    response["Location"] = reverse("core:chunked-upload-detail", kwargs={"id": upload.pk})
+    return response
+
+
+@login_required
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def chunked_upload_detail(request, id):
+    """
+    HEAD returns the current offset to resume from, PATCH appends the chunk
+    at `Upload-Offset`, checked against `Upload-Checksum`, and DELETE
+    abandons the upload. The last chunk creates the asset.
+    """
+    uploads = ChunkedUpload.objects.filter(created_by=request.user.email)
+
+    if request.method == "HEAD":
+        return _chunked_upload_response(get_object_or_404(uploads, pk=id), status=200)
+
+    if request.method == "DELETE":
+        get_object_or_404(uploads, pk=id).delete()
+        return HttpResponse(status=204)
+
+    if request.content_type != "application/offset+octet-stream":
+        return JsonResponse({"error": "Content-Type must be application/offset+octet-stream."}, status=415)
+
+    with transaction.atomic():
+        # Serialize concurrent requests for the same upload
+        upload = get_object_or_404(uploads.select_for_update(), pk=id)
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            append_chunk(upload, request, offset, request.headers.get("Upload-Checksum", ""))
+        except ValueError:
+            return JsonResponse({"error": "Upload-Offset is required."}, status=400)
+        except ChunkRejected as error:
+            return JsonResponse({"error": str(error), "offset": upload.offset}, status=error.status)
+
+    if upload.is_complete:
+        try:
+            asset = complete_upload(upload)
+        except ValidationError as error:
+            return JsonResponse({"errors": error.message_dict}, status=422)
+        queue_renditions([asset])
+
+    return _chunked_upload_response(upload)
+
+
+@never_cache
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Prometheus metrics, for the bearer token or allowed addresses only, see
+    `metrics.py`. Others get a 404, the endpoint is not advertised.
+    """
+    if not is_metrics_request_allowed(request):
+        raise Http404
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+@require_http_methods(["GET", "HEAD"])
+async def serve_media(request, path):
+    """
+    Uploaded files, only for logged in users but for the branding.
+    """
+    path = normalize_media_path(path)
+    user = await request.auser()
+    if not user.is_authenticated and not is_public_media(path):
+        return redirect_to_login(request.get_full_path())
+    if isinstance(request, ASGIRequest):
+        return await amedia_response(request, path)
+    # WSGI servers iterate file responses themselves
+    return media_response(request, path)
+
+
+@method_decorator([login_required, preload_user, revalidate, catalogue_condition], name="get")
+class AssetDetailView(DetailView):
     model = Asset
     pk_url_kwarg = "id"
+    queryset = (
+        Asset
+        .objects
+        .select_related("license", "dealer")
+        .prefetch_related("renditions")
+    )
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await aget_object_or_404(self.get_queryset(), pk=kwargs[self.pk_url_kwarg])
+        await sync_to_async(queue_renditions)([self.object])
+        # Rendered by Django in sync code, as usages and similar assets get
+        # queried from the template
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+
+def _warn_similar(request, asset):
+    similar = asset.find_similar(limit=5)
+    if similar:
+        links = format_html_join(
+            ", ",
+            '<a href="{}">{}</a>',
+            ((other.get_absolute_url(), other.title) for other in similar),
+        )
+        messages.warning(request, format_html("This image looks similar to: {}", links))
 
 
 class AssetCreate(LoginRequiredMixin, CreateView):
@@ -67,7 +280,16 @@ class AssetCreate(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.created_by = self.request.user.email
         form.instance.filename_orig = form.cleaned_data['file'].name
-        return super().form_valid(form)
+        duplicate = form.instance.prepare_file()
+        if duplicate:
+            messages.info(
+                self.request,
+                f'This file was already uploaded as asset "{duplicate}". Both assets share the stored file.',
+            )
+        response = super().form_valid(form)
+        _warn_similar(self.request, self.object)
+        queue_renditions([self.object])
+        return response
 
 
 class AssetUpdate(LoginRequiredMixin, UpdateView):
@@ -77,13 +299,28 @@ class AssetUpdate(LoginRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         form.instance.updated_by = self.request.user.email
-        return super().form_valid(form)
+        duplicate = form.instance.prepare_file()
+        if duplicate:
+            messages.info(
+                self.request,
+                f'This file was already uploaded as asset "{duplicate}". Both assets share the stored file.',
+            )
+        response = super().form_valid(form)
+        if "file" in form.changed_data:
+            _warn_similar(self.request, self.object)
+        queue_renditions([self.object])
+        return response
 
 
-class BaseListView(LoginRequiredMixin, ListView):
+@method_decorator([login_required, preload_user, revalidate, catalogue_condition], name="get")
+class BaseListView(ListView):
     context_object_name = "objects"
     template_name = "core/related_object_list.html"
 
+    async def get(self, request, *args, **kwargs):
+        self.object_list = [obj async for obj in self.get_queryset()]
+        return self.render_to_response(self.get_context_data())
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
@@ -102,15 +339,12 @@ class BaseListView(LoginRequiredMixin, ListView):
         queryset = super().get_queryset()
         queryset = (
             queryset
-            .annotate(
-                count=Count('asset'),
-            )
             .annotate(
                 highlight=Case(
                     When(id=to_highlight_id, then=Value(1)
                 ), default=Value(0))
             )
-            .order_by("-count")
+            .order_by("-asset_count")
         )
         return queryset
 
@@ -4,5 +4,5 @@ from ddam.organization.models import Branding
 
 def branding(request):
     """Make branding settings available for all requests."""
-    branding = Branding.load()
+    branding = Branding.load_cached()
     return {"branding": branding}
@@ -1,4 +1,8 @@
-from django.db import models
+import uuid
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete
 from django.core.validators import FileExtensionValidator
 from django.utils.translation import gettext_lazy as _
 
@@ -10,6 +14,9 @@ def validate_logo_image_file_extension(value):
     return FileExtensionValidator(allowed_extensions=valid_extensions)(value)
 
 
+BRANDING_VERSION_CACHE_KEY = "ddam:branding-version"
+
+
 class Branding(AbstractSingletonBaseModel):
     organization_name_en = models.CharField(
         max_length=255,
@@ -82,9 +89,48 @@ class Branding(AbstractSingletonBaseModel):
         help_text="If you host the documentation on your own, provide the URL here."
     )
 
+    # Process-local `(version, instance)`, see `load_cached`
+    _cached = None
+
+    @classmethod
+    def load_cached(cls):
+        """
+        The branding, held in memory by each process. Saving it bumps a
+        version in the shared cache, which makes every process load it
+        again, so in the steady state this costs one cache lookup and no
+        database query.
+        """
+        version = cache.get(BRANDING_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(BRANDING_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(BRANDING_VERSION_CACHE_KEY)
+
+        cached = cls._cached
+        if cached is None or cached[0] != version:
+            cached = (version, cls.load())
+            cls._cached = cached
+        return cached[1]
+
+    @classmethod
+    def invalidate_cache(cls):
+        cache.set(BRANDING_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Not before the commit, other processes would load the old row
+        transaction.on_commit(self.invalidate_cache)
+
     def __str__(self):
         return f"Branding for {self.organization_name_en or 'n/a'}"
 
     class Meta:
         verbose_name = "Branding"
         verbose_name_plural = "Branding"
+
+
+def _invalidate_on_delete(sender, **kwargs):
+    # `delete()` keeps the singleton, but queryset deletes remove it
+    transaction.on_commit(Branding.invalidate_cache)
+
+
+post_delete.connect(_invalidate_on_delete, sender=Branding, dispatch_uid="branding-delete")
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ddam.organization.models import BRANDING_VERSION_CACHE_KEY, Branding
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class BrandingCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Branding._cached = None
+        self.addCleanup(setattr, Branding, "_cached", None)
+
+    def test_save_invalidates_after_commit(self):
+        branding = Branding.load_cached()
+        version = cache.get(BRANDING_VERSION_CACHE_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            branding.organization_abbr = "NEW"
+            branding.save()
+            # A concurrent request would still read the old row
+            self.assertEqual(cache.get(BRANDING_VERSION_CACHE_KEY), version)
+
+        self.assertNotEqual(cache.get(BRANDING_VERSION_CACHE_KEY), version)
+        self.assertEqual(Branding.load_cached().organization_abbr, "NEW")
+        with self.assertNumQueries(0):
+            self.assertEqual(Branding.load_cached().organization_abbr, "NEW")
+
+    def test_rollback_keeps_version(self):
+        branding = Branding.load_cached()
+        version = cache.get(BRANDING_VERSION_CACHE_KEY)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            branding.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(cache.get(BRANDING_VERSION_CACHE_KEY), version)
+
+    def test_queryset_delete_invalidates(self):
+        Branding.load_cached()
+        version = cache.get(BRANDING_VERSION_CACHE_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Branding.objects.all().delete()
+
+        self.assertNotEqual(cache.get(BRANDING_VERSION_CACHE_KEY), version)
+        self.assertEqual(Branding.load_cached().organization_abbr, "ACME")
@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 See https://docs.djangoproject.com/en/4.0/howto/deployment/checklist/
 """
 
+import os
 from pathlib import Path
 import environ
 
@@ -54,6 +55,7 @@ THIRD_PARTY_APPS = [
     "crispy_bootstrap5",
     'django_htmx',
     'django_filters',
+    'django_tasks_db',
 ]
 LOCAL_APPS = [
     'ddam.apps.DDAMAdminConfig',  # replaces 'django.contrib.admin'
@@ -65,12 +67,14 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'ddam.core.instrumentation.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ddam.core.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -93,7 +97,7 @@ ROOT_URLCONF = 'ddam.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'ddam.core.instrumentation.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -122,6 +126,38 @@ DATABASES = {
 }
 
 
+# Cache, shared by all worker processes
+# https://django-environ.readthedocs.io/en/latest/types.html#environ-env-cache-url
+#
+# The default file cache only suits a single host: in production set
+# CACHE_URL to a Redis or memcached server shared by all app servers. It
+# culls a third of its entries at random once full, so it holds the
+# rendered asset grid tiles (one per asset) plus a few keys per page. It
+# lists its directory on every write, don't make it much larger.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default=f'filecache://{RUN_DIR / "cache"}'),
+}
+if CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+):
+    CACHES['default'].setdefault('OPTIONS', {}).setdefault(
+        'MAX_ENTRIES', env.int('CACHE_MAX_ENTRIES', default=20000),
+    )
+
+
+# Background tasks
+# https://docs.djangoproject.com/en/6.0/topics/tasks/
+# Run the worker via `./manage.py db_worker`
+
+TASKS = {
+    'default': {
+        'BACKEND': 'django_tasks_db.DatabaseBackend',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -163,8 +199,6 @@ FORMAT_MODULE_PATH = [
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.0/howto/static-files/
 
-STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
-
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
@@ -175,6 +209,71 @@ STATIC_ROOT = RUN_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = RUN_DIR / 'media'
 
+# Originals and renditions are only accessed via Django's storage API:
+# MEDIA_ROOT, or an S3 compatible object storage (AWS S3, MinIO, …) if a
+# bucket is set, see ddam/core/s3.py. Pages still link to MEDIA_URL, the
+# media view redirects to presigned URLs valid for DDAM_S3_SIGNED_URL_EXPIRE.
+DDAM_S3_BUCKET = env('DDAM_S3_BUCKET', default='')
+DDAM_S3_SIGNED_URL_EXPIRE = env.int('DDAM_S3_SIGNED_URL_EXPIRE', default=3600)  # Seconds
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+if DDAM_S3_BUCKET:
+    STORAGES['default'] = {
+        'BACKEND': 'ddam.core.s3.MediaS3Storage',
+        'OPTIONS': {
+            'bucket_name': DDAM_S3_BUCKET,
+            'endpoint_url': env('DDAM_S3_ENDPOINT_URL', default=None),
+            'region_name': env('DDAM_S3_REGION', default=None),
+            'access_key': env('DDAM_S3_ACCESS_KEY', default=None),
+            'secret_key': env('DDAM_S3_SECRET_KEY', default=None),
+            'querystring_expire': DDAM_S3_SIGNED_URL_EXPIRE,
+            # Names are content addressed: skip the existence check of each save
+            'file_overwrite': True,
+        },
+    }
+
+# Media files are served by ddam.core.media after checking the login. Let
+# the web server do the transfer: "nginx" (X-Accel-Redirect) or "apache"
+# (X-Sendfile), empty to stream from Django.
+DDAM_MEDIA_SENDFILE = env('DDAM_MEDIA_SENDFILE', default='')
+DDAM_MEDIA_ACCEL_LOCATION = '/protected-media/'
+# Path prefixes below MEDIA_ROOT served without login, e.g. the logo on the login page
+DDAM_MEDIA_PUBLIC_PREFIXES = ['branding/']
+# Threads for blocking file reads of async views under ASGI, see ddam/core/blocking.py
+DDAM_BLOCKING_WORKERS = 8
+
+# Per-request metrics as Server-Timing header and log line, see
+# ddam/core/instrumentation.py. Requests slower than the threshold get
+# logged as warning.
+DDAM_SERVER_TIMING = env.bool('DDAM_SERVER_TIMING', default=True)
+DDAM_SLOW_REQUEST_THRESHOLD = env.float('DDAM_SLOW_REQUEST_THRESHOLD', default=1.0)  # Seconds
+
+# Profiles of single requests, see ddam/core/profiling.py. Staff users add
+# ?_profile to a URL, DDAM_PROFILE_SAMPLE_RATE = N profiles one in N of all
+# requests, 0 none.
+DDAM_PROFILE_ROOT = RUN_DIR / 'profiles'
+DDAM_PROFILE_SAMPLE_RATE = env.int('DDAM_PROFILE_SAMPLE_RATE', default=0)
+DDAM_PROFILE_INTERVAL = 0.005  # Seconds between stack samples
+DDAM_PROFILE_KEEP = 200
+
+# Prometheus metrics at /metrics, see ddam/core/metrics.py. All processes
+# share their values through files in PROMETHEUS_MULTIPROC_DIR, empty it
+# when (re)starting the application. Only requests with the bearer token
+# or from the allowed addresses (or networks) get them.
+PROMETHEUS_MULTIPROC_DIR = Path(env('PROMETHEUS_MULTIPROC_DIR', default=str(RUN_DIR / 'metrics')))
+PROMETHEUS_MULTIPROC_DIR.mkdir(parents=True, exist_ok=True)
+# Read by prometheus_client itself
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = str(PROMETHEUS_MULTIPROC_DIR)
+DDAM_METRICS_TOKEN = env('DDAM_METRICS_TOKEN', default='')
+DDAM_METRICS_ALLOWED_IPS = env.list('DDAM_METRICS_ALLOWED_IPS', default=[])
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -211,10 +310,42 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 DDAM_ASSET_UPLOAD_DIR = 'assets'
 DDAM_ASSET_VALID_FILE_EXTENSIONS = ["svg", "jpg", "jpeg", "png", "webp"]  #  Removed "avif" for now, as Willow does not support it.
 DDAM_ASSET_MAX_FILESIZE = env.int("DDAM_ASSET_MAX_FILESIZE") * 1000 * 1024 if env("DDAM_ASSET_MAX_FILESIZE", default=None) else 3000 * 1024  # Bytes
+# Decompression bomb guard: a few MB of PNG can decode to gigabytes
+DDAM_ASSET_MAX_PIXELS = 50 * 1000 * 1000
+
+# Bulk upload: threads validating/storing files, assets per INSERT batch
+DDAM_UPLOAD_WORKERS = 4
+DDAM_UPLOAD_BATCH_SIZE = 50
+DATA_UPLOAD_MAX_NUMBER_FILES = 500
+
+# Resumable chunked uploads, assembled outside of MEDIA_ROOT
+DDAM_CHUNKED_UPLOAD_ROOT = RUN_DIR / 'uploads'
+DDAM_CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes
+
+# Asset list
+DDAM_ASSET_LIST_PAGE_SIZE = 60
 
 # Image renditions
-DDAM_RENDITION_SIZE = (600, 300)
-DDAM_RENDITION_ROOT = MEDIA_ROOT / 'renditions'
+# Presets map a name to the square box (px) renditions are fitted into.
+# Each preset is generated in each format, the first format is preferred
+# by browsers, the last one is the fallback for `<img src>`.
+DDAM_RENDITION_PRESETS = {
+    "sm": 200,
+    "md": 400,
+    "lg": 800,
+    "xl": 1600,
+}
+DDAM_RENDITION_DEFAULT_PRESET = "md"
+DDAM_RENDITION_FORMATS = ["WEBP", "JPEG"]
+# Directory of the renditions in the media storage
+DDAM_RENDITION_DIR = 'renditions'
+
+# Rendered asset grid tiles, see ddam/core/tiles.py
+DDAM_TILE_CACHE_TIMEOUT = 24 * 60 * 60  # Seconds
+
+# Near-duplicates: max. differing bits of the 64 bit perceptual hashes
+DDAM_SIMILAR_MAX_DISTANCE = 6
+DDAM_SIMILAR_ASSETS_LIMIT = 12
 
 # Map model class names to icons
 DDAM_ICONS_MAP = {
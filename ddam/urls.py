@@ -5,15 +5,18 @@ from django.conf.urls.static import static
 from django.views.generic.base import RedirectView
 from django.views.defaults import server_error
 
+from ddam.core.views import metrics, serve_media
+
 urlpatterns = [
     path('_500/', server_error),  # Forcefully raise 500 Internal Server Error
     path('', RedirectView.as_view(url='core/', permanent=False)),
     path('admin/', admin.site.urls),
     path('accounts/', include('ddam.accounts.urls')),
     path('core/', include('ddam.core.urls')),
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name='media'),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
     urlpatterns += [path('__debug__/', include('debug_toolbar.urls'))]
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1 +1,2 @@
 import * as bootstrap from 'bootstrap'
+import './htmx.min.js'